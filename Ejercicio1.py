@@ -1,8 +1,17 @@
+import csv
+import gc
+import json
+import sys
+import time
+from bisect import bisect_left
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import filedialog, messagebox
 
-# Clase que representa a un empleado
+# Clase que representa a un empleado.
+# __slots__ evita el __dict__ por instancia, que es lo que más memoria ocupa con millones de empleados.
 class Empleado:
+    __slots__ = ("nombre", "puesto")
+
     def __init__(self, nombre, puesto):
         # Valida que el nombre y el puesto sean cadenas no vacías
         if not isinstance(nombre, str) or not nombre.strip():
@@ -10,59 +19,372 @@ class Empleado:
         if not isinstance(puesto, str) or not puesto.strip():
             raise ValueError("El puesto del empleado debe ser una cadena no vacía.")   # raise sirve para lanzar excepciones
         self.nombre = nombre.strip()   # Guarda el nombre del empleado
-        self.puesto = puesto.strip()   # Guarda el puesto del empleado
+        self.puesto = sys.intern(puesto.strip())   # Guarda el puesto (compartido entre empleados del mismo puesto)
 
 # Nodo del árbol jerárquico, cada nodo es un empleado y sus subordinados
 class NodoEmpleado:
+    __slots__ = ("empleado", "subordinados", "jefe", "nivel", "ancestros", "indice")
+
     def __init__(self, empleado):
         # Valida que el argumento sea un objeto Empleado
         if not isinstance(empleado, Empleado):   #insistance verifica el tipo de un objeto
             raise TypeError("Debe recibir un objeto Empleado.")
         self.empleado = empleado           # Objeto Empleado asociado al nodo
         self.subordinados = []             # Lista de nodos subordinados
+        self.jefe = None                   # Nodo del jefe directo (None si es la raíz)
+        self.nivel = 0                     # Niveles por debajo de la raíz del árbol
+        self.ancestros = ()                # ancestros[k] es el jefe situado 2^k niveles más arriba
+        self.indice = {empleado.nombre: self}  # Índice nombre -> nodo, compartido por todo el árbol
 
     # Agrega un subordinado a este nodo
     def agregar_subordinado(self, nodo_subordinado):
         if not isinstance(nodo_subordinado, NodoEmpleado):
             raise TypeError("Solo se pueden agregar nodos de tipo NodoEmpleado.")
+        if nodo_subordinado.jefe is not None:
+            raise ValueError("El empleado ya tiene un jefe asignado.")
+        if nodo_subordinado.indice is self.indice:
+            raise ValueError("El empleado ya forma parte de esta jerarquía.")
+        if not nodo_subordinado.subordinados:
+            # Caso habitual: se cuelga una hoja, su índice solo la contiene a ella
+            nombre = nodo_subordinado.empleado.nombre
+            if nombre in self.indice:
+                raise ValueError(f"Ya existe un empleado con el nombre '{nombre}'.")
+            self.indice[nombre] = nodo_subordinado
+            nodo_subordinado.indice = self.indice
+            nodo_subordinado.jefe = self
+            self.subordinados.append(nodo_subordinado)
+            nodo_subordinado._actualizar_ancestros()
+            return
+        # Une los índices de ambos árboles: el pequeño se vuelca en el grande
+        indice, otro = self.indice, nodo_subordinado.indice
+        if len(otro) > len(indice):
+            indice, otro = otro, indice
+        for nombre in otro:
+            if nombre in indice:
+                raise ValueError(f"Ya existe un empleado con el nombre '{nombre}'.")
+        for nombre, nodo in otro.items():
+            indice[nombre] = nodo
+            nodo.indice = indice  # Todos los nodos pasan a compartir el mismo índice
+        nodo_subordinado.jefe = self
         self.subordinados.append(nodo_subordinado)  # Añade el subordinado a la lista
+        # Recalcula nivel y tabla de ancestros del subárbol recién colgado (padres antes que hijos)
+        for nodo, _ in recorrer_preorden(nodo_subordinado):
+            nodo._actualizar_ancestros()
+
+    # Traslada este empleado, con todo su equipo, bajo otro jefe de la misma jerarquía
+    def cambiar_jefe(self, nuevo_jefe):
+        if not isinstance(nuevo_jefe, NodoEmpleado):
+            raise TypeError("El nuevo jefe debe ser un NodoEmpleado.")
+        if self.jefe is None:
+            raise ValueError("No se puede mover al CEO.")
+        if nuevo_jefe.indice is not self.indice:
+            raise ValueError("El nuevo jefe no pertenece a esta jerarquía.")
+        if self.buscar(nuevo_jefe.empleado.nombre) is not None:
+            raise ValueError("El nuevo jefe no puede ser parte del equipo que se mueve.")
+        self.jefe.subordinados.remove(self)
+        self.jefe = nuevo_jefe
+        nuevo_jefe.subordinados.append(self)
+        for nodo, _ in recorrer_preorden(self):
+            nodo._actualizar_ancestros()
+
+    # Calcula el nivel y la tabla de saltos binarios a partir de los del jefe
+    def _actualizar_ancestros(self):
+        jefe = self.jefe
+        if jefe is None:
+            self.nivel = 0
+            self.ancestros = ()
+            return
+        self.nivel = jefe.nivel + 1
+        tabla = [jefe]
+        ancestros, k = jefe.ancestros, 0
+        # El ancestro 2^(k+1) arriba es el ancestro 2^k arriba del ancestro 2^k
+        while k < len(ancestros):
+            siguiente = ancestros[k]
+            tabla.append(siguiente)
+            ancestros = siguiente.ancestros
+            k += 1
+        self.ancestros = tuple(tabla)  # Una tupla ocupa menos que una lista
+
+    # Devuelve el ancestro que está en el nivel indicado usando saltos de potencias de 2
+    def ancestro_en_nivel(self, nivel):
+        salto = self.nivel - nivel
+        if salto < 0:
+            return None
+        nodo, k = self, 0
+        while salto:
+            if salto & 1:
+                nodo = nodo.ancestros[k]
+            salto >>= 1
+            k += 1
+        return nodo
 
     # Busca un empleado por nombre en el subárbol de este nodo
     def buscar(self, nombre):
-        if self.empleado.nombre == nombre:
-            return self  # Si el nombre coincide, retorna el nodo actual
-        for sub in self.subordinados:
-            encontrado = sub.buscar(nombre)  # Busca recursivamente en los subordinados
-            if encontrado:
-                return encontrado
+        nodo = self.indice.get(nombre)  # Búsqueda directa en el índice (tiempo constante)
+        if nodo is None or self.jefe is None:
+            return nodo  # Desde la raíz, cualquier nodo del índice está en el subárbol
+        # El índice cubre todo el árbol: se comprueba que el nodo cuelgue de este
+        if nodo.ancestro_en_nivel(self.nivel) is self:
+            return nodo
         return None  # Si no se encuentra, retorna None
 
-# Función para calcular cuántos niveles hay entre el CEO y un empleado dado
-def niveles_bajo_ceo(raiz, nombre_empleado):
+# Recorre el subárbol en preorden con una pila explícita (sin recursión).
+# Produce tuplas (nodo, nivel) con el nivel relativo al nodo inicial.
+def recorrer_preorden(raiz):
+    pila = [(raiz, 0)]
+    while pila:
+        nodo, nivel = pila.pop()
+        yield nodo, nivel
+        # Se apilan al revés para que los subordinados salgan en su orden
+        for sub in reversed(nodo.subordinados):
+            pila.append((sub, nivel + 1))
+
+# Recorre el subárbol en postorden (subordinados antes que su jefe) con una pila explícita
+def recorrer_postorden(raiz):
+    pila = [(raiz, 0, False)]
+    while pila:
+        nodo, nivel, visitado = pila.pop()
+        if visitado:
+            yield nodo, nivel
+            continue
+        pila.append((nodo, nivel, True))
+        for sub in reversed(nodo.subordinados):
+            pila.append((sub, nivel + 1, False))
+
+# Valida el nombre y devuelve el nodo del empleado dentro del subárbol de la raíz
+def _nodo_empleado(raiz, nombre_empleado):
     if not isinstance(raiz, NodoEmpleado):
         raise TypeError("La raíz debe ser un NodoEmpleado.")
     if not isinstance(nombre_empleado, str) or not nombre_empleado.strip():
         raise ValueError("El nombre del empleado debe ser una cadena no vacía.")
+    nodo = raiz.buscar(nombre_empleado.strip())  # Localiza al empleado en el índice
+    if nodo is None:
+        raise ValueError(f"Empleado '{nombre_empleado}' no encontrado en la jerarquía.")
+    return nodo
 
-    # Función recursiva para buscar el nivel del empleado
-    def buscar_niveles(nodo, nombre, nivel):
-        if nodo.empleado.nombre == nombre:
-            return nivel  # Si encuentra el empleado, retorna el nivel actual
-        for sub in nodo.subordinados:
-            resultado = buscar_niveles(sub, nombre, nivel + 1)  # Busca en los subordinados aumentando el nivel
-            if resultado is not None:
-                return resultado
-        return None  # Si no se encuentra, retorna None
+# Función para calcular cuántos niveles hay entre el CEO y un empleado dado
+def niveles_bajo_ceo(raiz, nombre_empleado):
+    nodo = _nodo_empleado(raiz, nombre_empleado)
+    return nodo.nivel - raiz.nivel  # Retorna el número de niveles bajo el CEO
 
-    niveles = buscar_niveles(raiz, nombre_empleado.strip(), 0)  # Inicia la búsqueda desde el nivel 0 (CEO)
-    if niveles is None:
-        raise ValueError(f"Empleado '{nombre_empleado}' no encontrado en la jerarquía.")
-    return niveles  # Retorna el número de niveles bajo el CEO
+# Devuelve el jefe común más cercano de dos empleados (ancestro común más bajo)
+def jefe_comun(raiz, nombre_a, nombre_b):
+    a = _nodo_empleado(raiz, nombre_a)
+    b = _nodo_empleado(raiz, nombre_b)
+    if a.nivel < b.nivel:
+        a, b = b, a
+    a = a.ancestro_en_nivel(b.nivel)  # Iguala los niveles de ambos empleados
+    if a is b:
+        return a
+    # Sube a ambos con saltos decrecientes mientras sus ancestros sean distintos
+    for k in range(len(a.ancestros) - 1, -1, -1):
+        if k < len(a.ancestros) and a.ancestros[k] is not b.ancestros[k]:
+            a, b = a.ancestros[k], b.ancestros[k]
+    return a.jefe
+
+# Calcula cuántos saltos separan a dos empleados pasando por su jefe común
+def distancia_empleados(raiz, nombre_a, nombre_b):
+    comun = jefe_comun(raiz, nombre_a, nombre_b)
+    a = raiz.buscar(nombre_a.strip())
+    b = raiz.buscar(nombre_b.strip())
+    return a.nivel + b.nivel - 2 * comun.nivel
+
+# Índice de subárboles basado en el recorrido de Euler (preorden) de la jerarquía.
+# Cada subárbol ocupa un intervalo contiguo de posiciones, de modo que los
+# conteos por puesto son búsquedas binarias en listas ordenadas de posiciones.
+# El índice es una foto del subárbol: mover_equipo lo mantiene al día, pero
+# cualquier agregar_subordinado hecho por fuera lo deja desactualizado (el nodo
+# nuevo no tiene posición y consultarlo lanza KeyError) hasta llamar a reconstruir().
+class IndiceSubarboles:
+    def __init__(self, raiz):
+        if not isinstance(raiz, NodoEmpleado):
+            raise TypeError("La raíz debe ser un NodoEmpleado.")
+        self.raiz = raiz
+        self.reconstruir()
+
+    # Recalcula el recorrido completo (necesario tras agregar empleados)
+    def reconstruir(self):
+        self.orden = [nodo for nodo, _ in recorrer_preorden(self.raiz)]  # Posición -> nodo
+        self.posicion = {nodo: i for i, nodo in enumerate(self.orden)}    # Nodo -> posición
+        self.tamano = {}                                                  # Nodo -> tamaño del subárbol
+        for nodo, _ in recorrer_postorden(self.raiz):
+            self.tamano[nodo] = 1 + sum(self.tamano[sub] for sub in nodo.subordinados)
+        self.por_puesto = {}  # Puesto -> posiciones ordenadas de los empleados con ese puesto
+        for i, nodo in enumerate(self.orden):
+            self.por_puesto.setdefault(nodo.empleado.puesto, []).append(i)
+
+    # Intervalo [inicio, fin) de posiciones que ocupa el subárbol del empleado
+    def _intervalo(self, nombre_empleado):
+        nodo = _nodo_empleado(self.raiz, nombre_empleado)
+        inicio = self.posicion[nodo]
+        return nodo, inicio, inicio + self.tamano[nodo]
+
+    # Número total de empleados por debajo del indicado (directos e indirectos)
+    def total_subordinados(self, nombre_empleado):
+        nodo, inicio, fin = self._intervalo(nombre_empleado)
+        return fin - inicio - 1
+
+    # Número de subordinados directos del empleado
+    def tramo_de_control(self, nombre_empleado):
+        return len(_nodo_empleado(self.raiz, nombre_empleado).subordinados)
+
+    # Cuenta por puesto dentro del subárbol (incluye al propio empleado).
+    # Con un puesto retorna un entero; sin él, un diccionario puesto -> cantidad.
+    def conteo_por_puesto(self, nombre_empleado, puesto=None):
+        nodo, inicio, fin = self._intervalo(nombre_empleado)
+        def contar(posiciones):
+            return bisect_left(posiciones, fin) - bisect_left(posiciones, inicio)
+        if puesto is not None:
+            return contar(self.por_puesto.get(puesto.strip(), []))
+        conteos = {p: contar(posiciones) for p, posiciones in self.por_puesto.items()}
+        return {p: c for p, c in conteos.items() if c}
+
+    # Produce el nodo y sus jefes hasta la raíz del índice (incluida).
+    # La raíz puede ser un jefe intermedio: sus jefes no están en el índice.
+    def _ancestros_indexados(self, nodo):
+        while True:
+            yield nodo
+            if nodo is self.raiz:
+                return
+            nodo = nodo.jefe
+
+    # Mueve a un empleado y a todo su equipo bajo un nuevo jefe.
+    # Solo se recalculan las posiciones entre el origen y el destino del bloque.
+    def mover_equipo(self, nombre_empleado, nombre_nuevo_jefe):
+        nodo, inicio, fin = self._intervalo(nombre_empleado)
+        nuevo_jefe = _nodo_empleado(self.raiz, nombre_nuevo_jefe)
+        destino = self.posicion[nuevo_jefe] + self.tamano[nuevo_jefe]  # Tras el último del nuevo jefe
+        jefe_anterior = nodo.jefe
+        nodo.cambiar_jefe(nuevo_jefe)  # Valida y reengancha el nodo en el árbol
+
+        # Actualiza los tamaños de los ancestros antiguos y nuevos, sin salir del subárbol indexado
+        tamano = fin - inicio
+        for ancestro in self._ancestros_indexados(jefe_anterior):
+            self.tamano[ancestro] -= tamano
+        for ancestro in self._ancestros_indexados(nuevo_jefe):
+            self.tamano[ancestro] += tamano
+
+        # Rota el tramo afectado para llevar el bloque del equipo a su destino
+        bloque = self.orden[inicio:fin]
+        if destino > inicio:
+            desde, hasta = inicio, destino
+            self.orden[desde:hasta] = self.orden[fin:destino] + bloque
+        else:
+            desde, hasta = destino, fin
+            self.orden[desde:hasta] = bloque + self.orden[destino:inicio]
+        nuevas = {}  # Puesto -> nuevas posiciones dentro del tramo rotado
+        for i in range(desde, hasta):
+            movido = self.orden[i]
+            self.posicion[movido] = i
+            nuevas.setdefault(movido.empleado.puesto, []).append(i)
+        # En el tramo hay los mismos empleados de cada puesto: se sustituye el trozo de la lista
+        for puesto, posiciones in nuevas.items():
+            lista = self.por_puesto[puesto]
+            i = bisect_left(lista, desde)
+            lista[i:i + len(posiciones)] = posiciones
+
+# Lee registros (nombre, puesto, jefe) de un archivo CSV o JSONL sin cargarlo entero en memoria
+def _leer_registros(ruta):
+    with open(ruta, newline="", encoding="utf-8") as archivo:
+        if ruta.lower().endswith(".jsonl"):
+            for numero, linea in enumerate(archivo, 1):
+                if not linea.strip():
+                    continue
+                try:
+                    dato = json.loads(linea)
+                except ValueError:
+                    yield numero, None, None, None, "Línea JSON no válida."
+                    continue
+                if not isinstance(dato, dict):
+                    yield numero, None, None, None, "Cada línea JSON debe ser un objeto."
+                    continue
+                yield numero, dato.get("nombre"), dato.get("puesto"), dato.get("jefe") or "", None
+        else:
+            for numero, fila in enumerate(csv.reader(archivo), 1):
+                if not fila:
+                    continue
+                # Omite la cabecera si el archivo la tiene
+                if numero == 1 and [c.strip().lower() for c in fila[:3]] == ["nombre", "puesto", "jefe"]:
+                    continue
+                fila += [""] * (3 - len(fila))
+                yield numero, fila[0], fila[1], fila[2], None
+
+# Carga masiva de empleados desde un archivo CSV (nombre,puesto,jefe) o JSONL
+def cargar_empleados(ruta, raiz=None):
+    """
+    Construye (o amplía) la jerarquía leyendo el archivo en una sola pasada.
+    Los empleados cuyo jefe aparece más adelante quedan en espera y se cuelgan
+    en cuanto llega el jefe. Retorna la raíz y un reporte con los cargados,
+    los nombres duplicados, los huérfanos (jefe inexistente) y los errores.
+    """
+    if raiz is not None and not isinstance(raiz, NodoEmpleado):
+        raise TypeError("La raíz debe ser un NodoEmpleado.")
+    reporte = {"cargados": 0, "duplicados": [], "huerfanos": [], "errores": []}
+    pendientes = {}   # Nombre del jefe aún no colgado -> nodos que lo esperan
+    esperando = {}    # Nombre -> nodo de los empleados en espera
+
+    # Cuelga un nodo y, en cascada, a todos los que esperaban por él
+    def colgar(jefe_nodo, nodo):
+        pila = [(jefe_nodo, nodo)]
+        while pila:
+            jefe_nodo, nodo = pila.pop()
+            if jefe_nodo is not None:
+                jefe_nodo.agregar_subordinado(nodo)
+            reporte["cargados"] += 1
+            for hijo in pendientes.pop(nodo.empleado.nombre, ()):
+                del esperando[hijo.empleado.nombre]
+                pila.append((nodo, hijo))
+
+    # El recolector cíclico recorrería millones de nodos vivos sin liberar nada
+    gc_activo = gc.isenabled()
+    gc.disable()
+    try:
+        for numero, nombre, puesto, jefe, error in _leer_registros(ruta):
+            if error is None:
+                try:
+                    nuevo = NodoEmpleado(Empleado(nombre, puesto))  # Aplica las validaciones de Empleado
+                except ValueError as e:
+                    error = str(e)
+            if error is None and not isinstance(jefe, str):
+                error = "El jefe debe ser una cadena."
+            if error is not None:
+                reporte["errores"].append((numero, error))
+                continue
+            nombre, jefe = nuevo.empleado.nombre, jefe.strip()
+            # Verifica si ya existe alguien con ese nombre (colgado o en espera)
+            if (raiz is not None and nombre in raiz.indice) or nombre in esperando:
+                reporte["duplicados"].append(nombre)
+                continue
+            if not jefe:
+                if raiz is not None:
+                    reporte["errores"].append((numero, "Ya existe un CEO."))
+                    continue
+                raiz = nuevo
+                colgar(None, nuevo)
+            elif raiz is not None and jefe in raiz.indice:
+                colgar(raiz.indice[jefe], nuevo)
+            else:
+                # El jefe todavía no ha aparecido: el empleado queda en espera
+                pendientes.setdefault(jefe, []).append(nuevo)
+                esperando[nombre] = nuevo
+    finally:
+        if gc_activo:
+            gc.enable()
+
+    # Los que siguen esperando no tienen un jefe alcanzable desde el CEO
+    for jefe, nodos in pendientes.items():
+        for nodo in nodos:
+            reporte["huerfanos"].append((nodo.empleado.nombre, jefe))
+    return raiz, reporte
+
+# Tamaño de los bloques de filas de la vista (un bloque se parte al doblar este tamaño)
+TAM_BLOQUE = 512
 
 # Clase principal de la aplicación con interfaz gráfica
 class JerarquiaApp:
     def __init__(self):
         self.raiz_jerarquia = None  # Nodo raíz del árbol (CEO)
+        self.indice_subarboles = None  # Índice de subárboles, se construye al consultar
         self.window = tk.Tk()  # Ventana principal de la aplicación
         self.window.title("Jerarquía Organizacional")
         self.window.configure(bg="#f0f4f8")  # Color de fondo
@@ -71,14 +393,25 @@ class JerarquiaApp:
         header = tk.Label(self.window, text="Jerarquía Organizacional", font=("Arial Rounded MT Bold", 20, "bold"), bg="#4f8cff", fg="white", pady=10)
         header.pack(fill=tk.X)
 
-        # Área de texto con scroll para mostrar la jerarquía
+        # Área de texto con scroll para mostrar la jerarquía.
+        # La vista es virtual: solo se escriben en el widget las filas visibles.
+        # Las filas (nodos en preorden) se guardan en bloques cortos para que insertar
+        # una fila solo desplace los elementos de un bloque y no la lista completa.
+        self.bloques = []        # Bloques consecutivos de nodos en preorden
+        self.bloque_de = {}      # Nodo -> bloque que contiene su fila
+        self.total_filas = 0     # Número total de filas
+        self.fila_inicio = 0     # Índice de la primera fila visible
+        self.filas_visibles = 16 # Alto del área de texto en líneas
         text_frame = tk.Frame(self.window, bg="#f0f4f8")
         text_frame.pack(pady=10)
-        self.tree = tk.Text(text_frame, width=55, height=16, font=("Consolas", 12), bg="#eaf1fb", fg="#222", bd=2, relief="groove")
+        self.tree = tk.Text(text_frame, width=55, height=self.filas_visibles, font=("Consolas", 12), bg="#eaf1fb", fg="#222", bd=2, relief="groove")
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scroll = tk.Scrollbar(text_frame, command=self.tree.yview)
-        scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        self.tree.config(yscrollcommand=scroll.set)
+        self.scroll = tk.Scrollbar(text_frame, command=self.desplazar)
+        self.scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        # La rueda del ratón mueve la ventana de filas en lugar del contenido del widget
+        self.tree.bind("<MouseWheel>", lambda e: self.desplazar("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self.desplazar("scroll", -1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self.desplazar("scroll", 1, "units"))
 
         # Formulario para agregar empleados
         frame = tk.LabelFrame(self.window, text="Agregar Empleado", font=("Arial", 12, "bold"), bg="#f0f4f8", fg="#4f8cff", bd=2, relief="ridge", padx=10, pady=10)
@@ -99,6 +432,9 @@ class JerarquiaApp:
         self.btn_agregar = tk.Button(frame, text="Agregar Empleado", command=self.agregar_empleado, bg="#4f8cff", fg="white", font=("Arial", 11, "bold"), relief="raised", bd=2, cursor="hand2", activebackground="#356ac3")
         self.btn_agregar.grid(row=3, column=0, columnspan=2, pady=8)
 
+        self.btn_cargar = tk.Button(frame, text="Cargar desde archivo...", command=self.cargar_archivo, bg="#4f8cff", fg="white", font=("Arial", 11, "bold"), relief="raised", bd=2, cursor="hand2", activebackground="#356ac3")
+        self.btn_cargar.grid(row=4, column=0, columnspan=2, pady=(0, 8))
+
         # Área para consultar niveles bajo el CEO
         consulta_frame = tk.Frame(self.window, bg="#f0f4f8")
         consulta_frame.pack(pady=10)
@@ -110,20 +446,84 @@ class JerarquiaApp:
         self.button = tk.Button(consulta_frame, text="Consultar niveles bajo CEO", command=self.consultar_niveles, bg="#4f8cff", fg="white", font=("Arial", 11, "bold"), relief="raised", bd=2, cursor="hand2", activebackground="#356ac3")
         self.button.pack(side=tk.LEFT, padx=5)
 
-    # Muestra la jerarquía en el área de texto, incluyendo el nivel
+    # Reconstruye los bloques de filas en preorden y muestra la ventana visible
     def mostrar_jerarquia(self):
-        self.tree.delete(1.0, tk.END)  # Limpia el área de texto
-        def recorrer(nodo, nivel):
-            # Inserta el nombre, puesto y nivel del empleado con indentación según el nivel
-            color = "#4f8cff" if nivel == 0 else "#222"
-            self.tree.insert(
-                tk.END,
-                f"{'  '*nivel}● {nodo.empleado.nombre} ({nodo.empleado.puesto}) [Nivel: {nivel}]\n"
-            )
-            for sub in nodo.subordinados:
-                recorrer(sub, nivel + 1)  # Llama recursivamente para los subordinados
+        filas = []
         if self.raiz_jerarquia:
-            recorrer(self.raiz_jerarquia, 0)
+            filas = [nodo for nodo, _ in recorrer_preorden(self.raiz_jerarquia)]
+        self.bloques = [filas[i:i + TAM_BLOQUE] for i in range(0, len(filas), TAM_BLOQUE)]
+        self.bloque_de = {nodo: bloque for bloque in self.bloques for nodo in bloque}
+        self.total_filas = len(filas)
+        self.dibujar_filas()
+
+    # Inserta solo la fila de un empleado recién agregado en su posición del preorden
+    def insertar_fila(self, nodo):
+        jefe = nodo.jefe
+        if jefe is None:
+            self.bloques = [[nodo]]
+            self.bloque_de = {nodo: self.bloques[0]}
+            self.total_filas = 1
+        else:
+            # La fila va justo después del último descendiente del hermano anterior (o del jefe)
+            anterior = jefe.subordinados[-2] if len(jefe.subordinados) > 1 else jefe
+            if anterior is not jefe:
+                while anterior.subordinados:
+                    anterior = anterior.subordinados[-1]
+            # Solo se recorre el bloque de la fila anterior, no todas las filas
+            bloque = self.bloque_de[anterior]
+            bloque.insert(bloque.index(anterior) + 1, nodo)
+            self.bloque_de[nodo] = bloque
+            self.total_filas += 1
+            # Un bloque que crece demasiado se parte en dos mitades
+            if len(bloque) > 2 * TAM_BLOQUE:
+                mitad = bloque[TAM_BLOQUE:]
+                del bloque[TAM_BLOQUE:]
+                k = next(k for k, b in enumerate(self.bloques) if b is bloque)
+                self.bloques.insert(k + 1, mitad)
+                for movido in mitad:
+                    self.bloque_de[movido] = mitad
+        self.dibujar_filas()
+
+    # Devuelve los nodos de las filas [inicio, fin) recorriendo los bloques
+    def filas_ventana(self, inicio, fin):
+        filas = []
+        for bloque in self.bloques:
+            if inicio >= len(bloque):
+                inicio -= len(bloque)
+                fin -= len(bloque)
+                continue
+            filas.extend(bloque[inicio:fin])
+            if fin <= len(bloque):
+                break
+            fin -= len(bloque)
+            inicio = 0
+        return filas
+
+    # Escribe en el área de texto únicamente las filas de la ventana visible
+    def dibujar_filas(self):
+        total = self.total_filas
+        self.fila_inicio = max(0, min(self.fila_inicio, total - self.filas_visibles))
+        fin = min(total, self.fila_inicio + self.filas_visibles)
+        self.tree.delete(1.0, tk.END)  # Limpia el área de texto
+        # Inserta el nombre, puesto y nivel del empleado con indentación según el nivel
+        self.tree.insert(tk.END, "".join(
+            f"{'  '*nodo.nivel}● {nodo.empleado.nombre} ({nodo.empleado.puesto}) [Nivel: {nodo.nivel}]\n"
+            for nodo in self.filas_ventana(self.fila_inicio, fin)
+        ))
+        if total:
+            self.scroll.set(self.fila_inicio / total, fin / total)
+        else:
+            self.scroll.set(0, 1)
+
+    # Atiende la barra de desplazamiento y la rueda moviendo la ventana de filas
+    def desplazar(self, accion, cantidad, unidad=None):
+        if accion == "moveto":
+            self.fila_inicio = int(float(cantidad) * self.total_filas)
+        elif accion == "scroll":
+            paso = self.filas_visibles if unidad == "pages" else 1
+            self.fila_inicio += int(cantidad) * paso
+        self.dibujar_filas()
+        return "break"
 
     # Lógica para agregar un empleado a la jerarquía
     def agregar_empleado(self):
@@ -155,13 +555,37 @@ class JerarquiaApp:
                     messagebox.showerror("Error", f"No se encontró al jefe '{jefe}'.")
                     return
                 jefe_nodo.agregar_subordinado(nuevo)
-            self.mostrar_jerarquia()  # Actualiza la visualización de la jerarquía
+            self.insertar_fila(nuevo)  # Actualiza solo la fila nueva en la visualización
+            self.indice_subarboles = None  # El índice de subárboles queda desactualizado
             self.entry_nombre.delete(0, tk.END)  # Limpia los campos del formulario
             self.entry_puesto.delete(0, tk.END)
             self.entry_jefe.delete(0, tk.END)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
+    # Carga masiva de empleados desde un archivo CSV o JSONL
+    def cargar_archivo(self):
+        ruta = filedialog.askopenfilename(
+            title="Cargar empleados",
+            filetypes=[("CSV o JSONL", "*.csv *.jsonl"), ("Todos los archivos", "*.*")]
+        )
+        if not ruta:
+            return
+        try:
+            self.raiz_jerarquia, reporte = cargar_empleados(ruta, self.raiz_jerarquia)
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.indice_subarboles = None
+        self.mostrar_jerarquia()  # Una sola actualización para toda la carga
+        messagebox.showinfo(
+            "Carga completada",
+            f"Cargados: {reporte['cargados']}\n"
+            f"Duplicados: {len(reporte['duplicados'])}\n"
+            f"Huérfanos: {len(reporte['huerfanos'])}\n"
+            f"Errores: {len(reporte['errores'])}"
+        )
+
     # Lógica para consultar cuántos niveles hay entre el CEO y un empleado
     def consultar_niveles(self):
         nombre = self.entry_consulta.get().strip()  # Obtiene el nombre a consultar
@@ -176,9 +600,13 @@ class JerarquiaApp:
             nodo = self.raiz_jerarquia.buscar(nombre)  # Busca el nodo del empleado
             if nodo:
                 puesto = nodo.empleado.puesto
+                if self.indice_subarboles is None:
+                    self.indice_subarboles = IndiceSubarboles(self.raiz_jerarquia)
+                total = self.indice_subarboles.total_subordinados(nombre)
                 messagebox.showinfo(
                     "Resultado",
-                    f"{nombre} ({puesto}) está en el nivel {niveles} debajo del CEO."
+                    f"{nombre} ({puesto}) está en el nivel {niveles} debajo del CEO.\n"
+                    f"Tiene {len(nodo.subordinados)} subordinados directos y {total} en total."
                 )
             else:
                 messagebox.showerror("Error", f"No se encontró al empleado '{nombre}'.")
@@ -189,7 +617,98 @@ class JerarquiaApp:
     def run(self):
         self.window.mainloop()
 
+# Mide el rendimiento de los recorridos sobre una cadena de mando muy profunda
+def benchmark_recorridos(profundidad=100_000):
+    raiz = NodoEmpleado(Empleado("E0", "CEO"))
+    nodo = raiz
+    inicio = time.perf_counter()
+    for i in range(1, profundidad):
+        nuevo = NodoEmpleado(Empleado(f"E{i}", "Jefe"))
+        nodo.agregar_subordinado(nuevo)
+        nodo = nuevo
+    print(f"Construcción de la cadena: {time.perf_counter() - inicio:.3f} s")
+
+    for nombre, recorrido in (("preorden", recorrer_preorden), ("postorden", recorrer_postorden)):
+        inicio = time.perf_counter()
+        visitados = sum(1 for _ in recorrido(raiz))
+        segundos = time.perf_counter() - inicio
+        print(f"Recorrido en {nombre}: {visitados} nodos en {segundos:.3f} s ({visitados / segundos:,.0f} nodos/s)")
+
+    ultimo = f"E{profundidad - 1}"
+    inicio = time.perf_counter()
+    niveles = niveles_bajo_ceo(raiz, ultimo)
+    print(f"niveles_bajo_ceo('{ultimo}') = {niveles} en {(time.perf_counter() - inicio) * 1e6:.1f} µs")
+
+# Compara con tracemalloc la memoria de la jerarquía con __slots__ frente a la
+# representación anterior basada en __dict__ y listas por nodo
+def benchmark_memoria(cantidad=1_000_000, puestos=20):
+    import random
+    import tracemalloc
+    random.seed(0)
+    jefes = [random.randrange(i) if i else -1 for i in range(cantidad)]  # Forma común del árbol
+
+    # Réplica de la representación anterior: objetos con __dict__ y lista por nodo
+    class EmpleadoConDict:
+        def __init__(self, nombre, puesto):
+            self.nombre = nombre
+            self.puesto = puesto
+
+    class NodoConDict:
+        def __init__(self, empleado):
+            self.empleado = empleado
+            self.subordinados = []
+            self.jefe = None
+            self.nivel = 0
+            self.ancestros = []
+            self.indice = None
+
+    def con_dict():
+        indice = {}
+        nodos = []
+        for i, j in enumerate(jefes):
+            nodo = NodoConDict(EmpleadoConDict(f"E{i}", f"Puesto {i % puestos}"))
+            nodo.indice = indice
+            indice[nodo.empleado.nombre] = nodo
+            if j >= 0:
+                jefe = nodos[j]
+                nodo.jefe = jefe
+                nodo.nivel = jefe.nivel + 1
+                jefe.subordinados.append(nodo)
+                nodo.ancestros = [jefe]
+                while len(nodo.ancestros) - 1 < len(nodo.ancestros[-1].ancestros):
+                    nodo.ancestros.append(nodo.ancestros[-1].ancestros[len(nodo.ancestros) - 1])
+            nodos.append(nodo)
+        return nodos[0]
+
+    def con_slots():
+        nodos = []
+        for i, j in enumerate(jefes):
+            nodo = NodoEmpleado(Empleado(f"E{i}", f"Puesto {i % puestos}"))
+            if j >= 0:
+                nodos[j].agregar_subordinado(nodo)
+            nodos.append(nodo)
+        return nodos[0]
+
+    for nombre, construir in (("__dict__ + listas", con_dict), ("__slots__", con_slots)):
+        gc_activo = gc.isenabled()
+        gc.disable()
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        raiz = construir()
+        segundos = time.perf_counter() - inicio
+        memoria, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del raiz
+        if gc_activo:
+            gc.enable()
+        gc.collect()
+        print(f"{nombre}: {memoria / 2**20:,.1f} MiB ({memoria / cantidad:,.0f} bytes/empleado), construido en {segundos:.1f} s")
+
 # Punto de entrada de la aplicación
 if __name__ == "__main__":
-    app = JerarquiaApp()
-    app.run()
\ No newline at end of file
+    if "--benchmark" in sys.argv[1:]:
+        benchmark_recorridos()
+        benchmark_memoria()
+    else:
+        app = JerarquiaApp()
+        app.run()
\ No newline at end of file
@@ -1,114 +1,1120 @@
+import heapq
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from fnmatch import fnmatch, translate
+from itertools import count, islice
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él, las listas de trigramas se intersecan en Python
+    np = None
+
+# Marcas de inicio y fin de nombre para que los trigramas distingan prefijos y sufijos
+INICIO, FIN = "\x00", "\x01"
+
+# Trigramas de un texto (subcadenas de 3 caracteres)
+def _trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+# Trigramas de los fragmentos literales de un patrón con comodines (*, ? y [...])
+def _trigramas_patron(patron):
+    fragmentos, actual, i = [], INICIO, 0
+    while i < len(patron):
+        caracter = patron[i]
+        if caracter in "*?[":
+            fragmentos.append(actual)
+            actual = ""
+            if caracter == "[":
+                cierre = patron.find("]", i + 2)
+                i = cierre if cierre != -1 else i
+        else:
+            actual += caracter
+        i += 1
+    fragmentos.append(actual + FIN)
+    trigramas = set()
+    for fragmento in fragmentos:
+        trigramas |= _trigramas(fragmento)
+    return trigramas
+
+# Intersección de listas de ids ordenadas (las listas de trigramas crecen por id).
+# Parte de la más corta; si quedan pocos candidatos frente a la lista siguiente, se
+# busca cada uno con búsqueda binaria, y si no, se intersecan como conjuntos.
+# Puede devolver algunos candidatos de más: el patrón se comprueba después igualmente.
+def _interseccion(listas):
+    listas = sorted(listas, key=len)
+    if np is not None and len(listas[0]):
+        # Con NumPy las búsquedas binarias de todos los candidatos se hacen de una vez
+        candidatos = np.frombuffer(listas[0], dtype=np.uintc)
+        for lista in listas[1:]:
+            if len(candidatos) <= 64:
+                break
+            lista = np.frombuffer(lista, dtype=np.uintc)
+            posiciones = np.searchsorted(lista, candidatos)
+            posiciones[posiciones == len(lista)] = 0
+            candidatos = candidatos[lista[posiciones] == candidatos]
+        return candidatos.tolist()
+    candidatos = listas[0]
+    for lista in listas[1:]:
+        if len(candidatos) <= 64:
+            break  # Con tan pocos candidatos es más barato comprobar el patrón directamente
+        if len(candidatos) * 8 < len(lista):
+            comunes = array("I")
+            desde = 0
+            for ident in candidatos:
+                desde = bisect_left(lista, ident, desde)
+                if desde == len(lista):
+                    break
+                if lista[desde] == ident:
+                    comunes.append(ident)
+        else:
+            # tolist() evita crear los enteros uno a uno al iterar el array
+            comunes = array("I", sorted(set(candidatos.tolist()).intersection(lista.tolist())))
+        candidatos = comunes
+    return candidatos
+
+# Índice nombre -> elementos, compartido por todos los directorios de un mismo árbol.
+# Incluye un índice de trigramas sobre los nombres distintos para búsquedas con comodines
+# (con trigramas=False no se calcula al indexar, sino en la primera búsqueda por patrón).
+class IndiceFS:
+    def __init__(self, trigramas=True):
+        # Nombre -> elementos con ese nombre; un dict sin valores hace de conjunto ordenado,
+        # así retirar un elemento es O(1) aunque el nombre se repita mucho (README, index.js)
+        self.por_nombre = {}
+        self.total = 0        # Número de elementos indexados
+        self.nombres = []     # Id -> nombre (los ids nunca se reutilizan)
+        self.id_de = {}       # Nombre -> id
+        self.trigramas = {} if trigramas else None  # Trigrama -> ids de los nombres que lo contienen
+
+    # Da de alta un nombre en el índice de trigramas la primera vez que aparece
+    def _indexar_nombre(self, nombre):
+        if self.trigramas is None or nombre in self.id_de:
+            return
+        ident = len(self.nombres)
+        self.nombres.append(nombre)
+        self.id_de[nombre] = ident
+        for trigrama in _trigramas(INICIO + nombre + FIN):
+            self.trigramas.setdefault(trigrama, array("I")).append(ident)
+
+    # Calcula los trigramas de todos los nombres (índices creados con trigramas=False)
+    def _construir_trigramas(self):
+        self.trigramas = {}
+        for nombre in self.por_nombre:
+            self._indexar_nombre(nombre)
+
+    def retirar(self, elemento):
+        elementos = self.por_nombre[elemento.nombre]
+        del elementos[elemento]
+        if not elementos:
+            # Los trigramas del nombre se conservan; las búsquedas descartan nombres sin elementos
+            del self.por_nombre[elemento.nombre]
+        self.total -= 1
+
+    def registrar(self, elemento):
+        elementos = self.por_nombre.get(elemento.nombre)
+        if elementos is None:
+            elementos = self.por_nombre[elemento.nombre] = {}
+            self._indexar_nombre(elemento.nombre)
+        elementos[elemento] = None
+        self.total += 1
+
+    # Incorpora todos los elementos de otro índice; sus directorios pasan a usar este
+    def absorber(self, otro):
+        for nombre, elementos in otro.por_nombre.items():
+            if nombre not in self.por_nombre:
+                self.por_nombre[nombre] = {}
+                self._indexar_nombre(nombre)
+            self.por_nombre[nombre].update(elementos)
+            for elemento in elementos:
+                if isinstance(elemento, Directorio):
+                    elemento.indice = self
+        self.total += otro.total
+
+    # Genera los nombres indexados que cumplen un patrón con comodines ('*.log', 'informe*').
+    # Sin comodines, busca el texto como subcadena del nombre.
+    def nombres_por_patron(self, patron):
+        if not any(c in patron for c in "*?["):
+            patron = f"*{patron}*"
+        coincide = re.compile(translate(patron)).match
+        if self.trigramas is None:
+            self._construir_trigramas()
+        # Los candidatos salen de intersecar las listas de los trigramas del patrón
+        listas = [self.trigramas.get(t, ()) for t in _trigramas_patron(patron)]
+        if listas:
+            candidatos = (self.nombres[i] for i in _interseccion(listas))
+        else:
+            candidatos = iter(self.por_nombre)  # Patrón sin trigramas: se revisan todos los nombres
+        for nombre in candidatos:
+            if nombre in self.por_nombre and coincide(nombre):
+                yield nombre
 
 # Clase base para elementos del sistema de archivos (directorio o archivo)
 class ElementoFS:
     def __init__(self, nombre):
         self.nombre = nombre  # Nombre del elemento
+        self.padre = None     # Directorio que lo contiene (None si es la raíz)
+        self.inodo = None     # Inodo en disco (solo en árboles escaneados)
+
+    # Construye la ruta completa subiendo por los padres (solo cuando se pide)
+    def ruta(self):
+        nombres = []
+        elemento = self
+        while elemento is not None:
+            if elemento.nombre:
+                nombres.append(elemento.nombre)
+            elemento = elemento.padre
+        return "/" + "/".join(reversed(nombres))
 
 # Clase para archivos, hereda de ElementoFS
 class Archivo(ElementoFS):
-    def __init__(self, nombre):
+    def __init__(self, nombre, tamano=0, mtime=None):
         super().__init__(nombre)  # Inicializa con el nombre
+        if tamano < 0:
+            raise ValueError("El tamaño del archivo no puede ser negativo.")
+        self.tamano = tamano      # Tamaño en bytes
+        self.mtime = mtime        # Fecha de modificación (ns desde la época) o None
 
 # Clase para directorios, hereda de ElementoFS
 class Directorio(ElementoFS):
+    TRIGRAMAS = True  # Si el índice del árbol calcula los trigramas al indexar cada nombre
+
     def __init__(self, nombre):
         super().__init__(nombre)  # Inicializa con el nombre
-        self.hijos = []           # Lista de hijos (archivos o directorios)
+        self.entradas = {}        # Hijos (archivos o directorios) por nombre
+        self.mtime = None         # mtime (ns) del directorio cuando se listó por última vez
+        self.tamano_total = 0     # Bytes de todos los archivos del subárbol (acumulado)
+        self.num_archivos = 0     # Archivos del subárbol (acumulado)
+        self.indice = IndiceFS(self.TRIGRAMAS)  # Índice del árbol al que pertenece el directorio
+        self.indice.registrar(self)
+
+    # Hijos en orden de inserción
+    @property
+    def hijos(self):
+        return self.entradas.values()
+
+    # Indica si el directorio tiene contenido (sin cargarlo, en los perezosos)
+    def tiene_hijos(self):
+        return bool(self.entradas)
 
     def agregar(self, elemento):
-        self.hijos.append(elemento)  # Agrega un hijo al directorio
-
-# Busca la ruta completa de un elemento (archivo o directorio) dado su nombre, recorriendo el árbol desde la raíz
-def buscar_ruta_elemento(raiz, nombre_elemento, ruta_actual=""):
-    # Si el nodo actual coincide con el nombre buscado (ya sea archivo o directorio)
-    if raiz.nombre == nombre_elemento:
-        return ruta_actual + "/" + raiz.nombre if raiz.nombre else "/"
-    # Si es un directorio, buscar recursivamente en sus hijos
-    if isinstance(raiz, Directorio):
-        for hijo in raiz.hijos:
-            resultado = buscar_ruta_elemento(hijo, nombre_elemento, ruta_actual + "/" + raiz.nombre)
-            if resultado:
-                return resultado
-    return None
+        self._enlazar(elemento)
+        if isinstance(elemento, Directorio):
+            self._acumular(elemento.tamano_total, elemento.num_archivos)
+        else:
+            self._acumular(elemento.tamano, 1)
+
+    # Suma los cambios de tamaño y de archivos a este directorio y a sus ancestros (O(profundidad))
+    def _acumular(self, tamano, archivos):
+        if not tamano and not archivos:
+            return  # Un directorio vacío no cambia ningún acumulado
+        directorio = self
+        while directorio is not None:
+            directorio.tamano_total += tamano
+            directorio.num_archivos += archivos
+            directorio = directorio.padre
+
+    # Cambia el tamaño y la fecha de un archivo hijo actualizando los acumulados
+    def actualizar_archivo(self, nombre, tamano, mtime=None):
+        archivo = self.entradas.get(nombre)
+        if not isinstance(archivo, Archivo):
+            raise ValueError(f"No existe el archivo '{nombre}' en este directorio.")
+        if tamano < 0:
+            raise ValueError("El tamaño del archivo no puede ser negativo.")
+        self._acumular(tamano - archivo.tamano, 0)
+        archivo.tamano, archivo.mtime = tamano, mtime
+
+    # Engancha un hijo y actualiza los índices, sin tocar los acumulados
+    def _enlazar(self, elemento):
+        if not isinstance(elemento, ElementoFS):
+            raise TypeError("Solo se pueden agregar archivos o directorios.")
+        if elemento.padre is not None:
+            raise ValueError(f"'{elemento.nombre}' ya está dentro de otro directorio.")
+        if elemento.nombre in self.entradas:
+            raise ValueError(f"Ya existe '{elemento.nombre}' en este directorio.")
+        if isinstance(elemento, Directorio):
+            if elemento.indice is self.indice:
+                raise ValueError("No se puede agregar un directorio dentro de sí mismo.")
+            # Une los índices de ambos árboles: el pequeño se vuelca en el grande
+            grande, pequeno = self.indice, elemento.indice
+            if pequeno.total > grande.total:
+                grande, pequeno = pequeno, grande
+            grande.absorber(pequeno)
+        else:
+            self.indice.registrar(elemento)
+        self.entradas[elemento.nombre] = elemento  # Agrega un hijo al directorio
+        elemento.padre = self
+
+    # Quita un hijo (con todo su contenido) y lo devuelve como un árbol independiente
+    def quitar(self, nombre):
+        if nombre not in self.entradas:
+            raise ValueError(f"No existe '{nombre}' en este directorio.")
+        elemento = self.entradas[nombre]
+        if isinstance(elemento, Directorio):
+            subarbol = [sub for sub, _ in recorrer_preorden(elemento)]  # Carga antes los hijos perezosos
+            # El subárbol quitado suele descartarse (p. ej. al refrescar): sus trigramas se
+            # calculan solo si llega a buscarse por patrón
+            indice = IndiceFS(trigramas=False)
+            for sub in subarbol:
+                self.indice.retirar(sub)
+                indice.registrar(sub)
+                if isinstance(sub, Directorio):
+                    sub.indice = indice
+        else:
+            self.indice.retirar(elemento)
+        del self.entradas[nombre]
+        elemento.padre = None
+        if isinstance(elemento, Directorio):
+            self._acumular(-elemento.tamano_total, -elemento.num_archivos)
+        else:
+            self._acumular(-elemento.tamano, -1)
+        return elemento
+
+    # Cambia el nombre de un hijo conservando su contenido
+    def renombrar(self, nombre, nuevo_nombre):
+        if nombre not in self.entradas:
+            raise ValueError(f"No existe '{nombre}' en este directorio.")
+        if nuevo_nombre in self.entradas:
+            raise ValueError(f"Ya existe '{nuevo_nombre}' en este directorio.")
+        elemento = self.entradas.pop(nombre)
+        self.indice.retirar(elemento)
+        elemento.nombre = nuevo_nombre
+        self.indice.registrar(elemento)
+        self.entradas[nuevo_nombre] = elemento
+
+    # Devuelve el elemento de una ruta como "/home/usuario/documentos" (o None si no existe).
+    # Las rutas relativas se resuelven desde este directorio.
+    def resolver(self, ruta):
+        actual = self
+        partes = ruta.split("/")
+        if ruta.startswith("/"):
+            while actual.padre is not None:
+                actual = actual.padre
+            partes = [parte for parte in partes if parte]
+            # Si la raíz tiene nombre (árbol escaneado), es el primer componente de sus rutas
+            if actual.nombre and partes:
+                if partes[0] != actual.nombre:
+                    return None
+                partes = partes[1:]
+        for parte in partes:
+            if not parte or parte == ".":
+                continue
+            if parte == "..":
+                actual = actual.padre if actual.padre is not None else actual
+            elif isinstance(actual, Directorio):
+                actual = actual.entradas.get(parte)
+                if actual is None:
+                    return None
+            else:
+                return None  # Un archivo no tiene hijos
+        return actual
+
+# Indica si el elemento está dentro del subárbol de la raíz indicada
+def _esta_dentro(elemento, raiz):
+    if raiz.padre is None:
+        return True  # El índice solo contiene elementos del árbol de esta raíz
+    while elemento is not None and elemento is not raiz:
+        elemento = elemento.padre
+    return elemento is raiz
+
+# Recorre el árbol en preorden con una pila explícita (sin recursión).
+# Produce tuplas (elemento, nivel) con el nivel relativo a la raíz del recorrido.
+def recorrer_preorden(raiz):
+    pila = [(raiz, 0)]
+    while pila:
+        elemento, nivel = pila.pop()
+        yield elemento, nivel
+        if isinstance(elemento, Directorio):
+            # Se apilan al revés para que los hijos salgan en su orden
+            for hijo in reversed(elemento.hijos):
+                pila.append((hijo, nivel + 1))
+
+# Recorre el árbol en postorden (hijos antes que su directorio) con una pila explícita
+def recorrer_postorden(raiz):
+    pila = [(raiz, 0, False)]
+    while pila:
+        elemento, nivel, visitado = pila.pop()
+        if visitado or not isinstance(elemento, Directorio):
+            yield elemento, nivel
+            continue
+        pila.append((elemento, nivel, True))
+        for hijo in reversed(elemento.hijos):
+            pila.append((hijo, nivel + 1, False))
+
+# Genera, sin recorrer el árbol, todos los elementos con ese nombre dentro de la raíz.
+# En un árbol abierto desde una instantánea se consulta su índice de nombres y solo
+# se cargan los directorios de la ruta de cada resultado.
+def buscar_elementos(raiz, nombre_elemento):
+    if isinstance(raiz, DirectorioInstantanea):
+        yield from raiz._instantanea.elementos_por_nombre(nombre_elemento, raiz._posicion)
+        return
+    for elemento in raiz.indice.por_nombre.get(nombre_elemento, ()):
+        if _esta_dentro(elemento, raiz):
+            yield elemento
+
+# Genera los elementos cuyo nombre cumple un patrón con comodines o contiene un texto
+def buscar_patron(raiz, patron):
+    indice = raiz._instantanea if isinstance(raiz, DirectorioInstantanea) else raiz.indice
+    for nombre in indice.nombres_por_patron(patron):
+        yield from buscar_elementos(raiz, nombre)
+
+# Genera las rutas completas de todos los elementos con ese nombre
+def buscar_rutas(raiz, nombre_elemento):
+    for elemento in buscar_elementos(raiz, nombre_elemento):
+        yield elemento.ruta()  # La ruta se construye solo al pedirla
+
+# Busca la ruta completa de un elemento (archivo o directorio) dado su nombre
+def buscar_ruta_elemento(raiz, nombre_elemento):
+    return next(buscar_rutas(raiz, nombre_elemento), None)
+
+# ---------------- Instantáneas binarias del árbol ----------------
+# Formato (columnas contiguas, un valor por nodo en orden de anchura, así los
+# hijos de cada directorio ocupan un rango contiguo):
+#   cabecera | tamaño (u64) | mtime (i64) | inodo (u64) | claves de trigrama (u64) |
+#   padres | primer hijo | número de hijos | desplazamiento del nombre |
+#   longitud del nombre | archivos acumulados (u32) | posiciones por nombre (u32) |
+#   inicios de grupo (u32) | inicios de lista (u32) | listas de trigramas (u32) |
+#   tipos (u8) | pool de nombres UTF-8
+# En los directorios, el tamaño es el acumulado del subárbol.
+# El índice de nombres agrupa las posiciones de los nodos por nombre, con los grupos
+# en orden alfabético; "inicios de grupo" tiene una entrada por nombre distinto más
+# una final, y permite buscar un nombre con búsqueda binaria sin cargar directorios.
+# Los trigramas de los nombres distintos se guardan como en IndiceFS: cada clave
+# (tres caracteres empaquetados en 21 bits cada uno, en orden) tiene su lista
+# ordenada de grupos, así las búsquedas por patrón no decodifican todos los nombres.
+MAGIA = b"FSNP"
+VERSION_INSTANTANEA = 4
+# Magia, versión, orden de bytes, nodos, tamaño del pool, nombres distintos, trigramas, ids de las listas
+_CABECERA = struct.Struct("<4sHBxIQIII")
+_SIN_PADRE = 0xFFFFFFFF
+_SIN_MTIME = -1
+# (columna, tipo, cantidad de valores); las de 64 bits van primero para quedar alineadas
+_COLUMNAS = (
+    ("tamanos", "Q", "nodos"), ("mtimes", "q", "nodos"), ("inodos", "Q", "nodos"),
+    ("claves_trigrama", "Q", "trigramas"),
+    ("padres", "I", "nodos"), ("primeros", "I", "nodos"), ("cantidades", "I", "nodos"),
+    ("desplazamientos", "I", "nodos"), ("longitudes", "I", "nodos"), ("archivos", "I", "nodos"),
+    ("por_nombre", "I", "nodos"), ("inicios_nombre", "I", "grupos"),
+    ("inicios_trigrama", "I", "listas"), ("ids_trigrama", "I", "ids"), ("tipos", "B", "nodos"),
+)
+
+# Clave numérica de un trigrama: ordenar las claves equivale a ordenar los trigramas
+def _clave_trigrama(trigrama):
+    return (ord(trigrama[0]) << 42) | (ord(trigrama[1]) << 21) | ord(trigrama[2])
+
+# Guarda el árbol en un archivo de instantánea binaria
+def guardar_instantanea(raiz, ruta):
+    columnas = {nombre: array(codigo) for nombre, codigo, _ in _COLUMNAS}
+    pool = bytearray()
+    posiciones_nombre = {}  # Nombre -> desplazamiento en el pool (los repetidos se guardan una vez)
+    grupos = {}             # Nombre -> posiciones de los nodos con ese nombre
+    orden = [raiz]
+    padres = [_SIN_PADRE]
+    i = 0
+    while i < len(orden):
+        elemento = orden[i]
+        es_dir = isinstance(elemento, Directorio)
+        columnas["tipos"].append(1 if es_dir else 0)
+        columnas["padres"].append(padres[i])
+        hijos = elemento.hijos if es_dir else ()
+        columnas["primeros"].append(len(orden))
+        columnas["cantidades"].append(len(hijos))
+        orden.extend(hijos)
+        padres.extend([i] * len(hijos))
+        columnas["tamanos"].append(elemento.tamano_total if es_dir else elemento.tamano)
+        columnas["archivos"].append(elemento.num_archivos if es_dir else 0)
+        columnas["mtimes"].append(_SIN_MTIME if elemento.mtime is None else elemento.mtime)
+        columnas["inodos"].append(elemento.inodo or 0)
+        datos = elemento.nombre.encode("utf-8")
+        desplazamiento = posiciones_nombre.get(elemento.nombre)
+        if desplazamiento is None:
+            desplazamiento = posiciones_nombre[elemento.nombre] = len(pool)
+            pool += datos
+        if len(pool) > _SIN_PADRE:
+            raise ValueError("El pool de nombres supera el tamaño admitido (4 GiB).")
+        columnas["desplazamientos"].append(desplazamiento)
+        columnas["longitudes"].append(len(datos))
+        grupos.setdefault(elemento.nombre, []).append(i)
+        i += 1
+    # Índice de nombres: grupos de posiciones en orden alfabético de nombre, y las
+    # listas de grupos de cada trigrama (crecen en orden porque k aumenta)
+    por_trigrama = {}
+    for k, nombre in enumerate(sorted(grupos)):
+        columnas["inicios_nombre"].append(len(columnas["por_nombre"]))
+        columnas["por_nombre"].extend(grupos[nombre])
+        for trigrama in _trigramas(INICIO + nombre + FIN):
+            por_trigrama.setdefault(trigrama, array("I")).append(k)
+    columnas["inicios_nombre"].append(len(orden))
+    for trigrama in sorted(por_trigrama):
+        columnas["claves_trigrama"].append(_clave_trigrama(trigrama))
+        columnas["inicios_trigrama"].append(len(columnas["ids_trigrama"]))
+        columnas["ids_trigrama"].extend(por_trigrama[trigrama])
+    columnas["inicios_trigrama"].append(len(columnas["ids_trigrama"]))
+    with open(ruta, "wb") as archivo:
+        archivo.write(_CABECERA.pack(MAGIA, VERSION_INSTANTANEA, sys.byteorder == "big", len(orden),
+                                     len(pool), len(grupos), len(por_trigrama), len(columnas["ids_trigrama"])))
+        for nombre, _, _ in _COLUMNAS:
+            columnas[nombre].tofile(archivo)
+        archivo.write(pool)
+    return len(orden)
+
+# Instantánea abierta con mmap: no se lee nada hasta que se accede a un nodo.
+# Varios procesos que abren el mismo archivo comparten sus páginas de solo lectura.
+class Instantanea:
+    def __init__(self, ruta):
+        with open(ruta, "rb") as archivo:
+            self._mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        magia, version, grande, self.total, tam_pool, self.distintos, self.num_trigramas, num_ids = \
+            _CABECERA.unpack_from(self._mapa, 0)
+        if magia != MAGIA or version != VERSION_INSTANTANEA:
+            self._mapa.close()
+            raise ValueError(f"'{ruta}' no es una instantánea válida.")
+        if grande != (sys.byteorder == "big"):
+            self._mapa.close()
+            raise ValueError("La instantánea se creó con otro orden de bytes.")
+        self._largos = {"nodos": self.total, "trigramas": self.num_trigramas, "grupos": self.distintos + 1,
+                        "listas": self.num_trigramas + 1, "ids": num_ids, "pool": tam_pool}
+        self._mapear()
+        self._raiz = None
+
+    # Crea las vistas de las columnas sobre el mapa
+    def _mapear(self):
+        vista = memoryview(self._mapa)
+        inicio = _CABECERA.size
+        for nombre, codigo, cantidad in _COLUMNAS:
+            fin = inicio + struct.calcsize(codigo) * self._largos[cantidad]
+            setattr(self, "_" + nombre, vista[inicio:fin].cast(codigo))
+            inicio = fin
+        self._pool = vista[inicio:inicio + self._largos["pool"]]
+        vista.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    # Cierra el mapa. Si alguien aún retiene una vista sobre él, el mapa no se puede
+    # cerrar: se vuelven a crear las columnas y la instantánea sigue utilizable.
+    def cerrar(self):
+        for nombre in ("pool",) + tuple(nombre for nombre, _, _ in _COLUMNAS):
+            getattr(self, "_" + nombre).release()
+        try:
+            self._mapa.close()
+        except BufferError:
+            self._mapear()
+            raise
+
+    def nombre(self, posicion):
+        inicio = self._desplazamientos[posicion]
+        return str(self._pool[inicio:inicio + self._longitudes[posicion]], "utf-8")
+
+    # Crea la vista de un nodo: directorio perezoso o archivo
+    def elemento(self, posicion):
+        if self._tipos[posicion]:
+            elemento = DirectorioInstantanea(self, posicion)
+        else:
+            elemento = Archivo(self.nombre(posicion), self._tamanos[posicion])
+        mtime = self._mtimes[posicion]
+        elemento.mtime = None if mtime == _SIN_MTIME else mtime
+        elemento.inodo = self._inodos[posicion] or None
+        return elemento
+
+    # Raíz del árbol (siempre la misma); sus hijos se materializan al consultarlos
+    def raiz(self):
+        if self._raiz is None:
+            self._raiz = self.elemento(0)
+        return self._raiz
+
+    # Nombre del grupo k del índice de nombres
+    def _nombre_grupo(self, k):
+        return self.nombre(self._por_nombre[self._inicios_nombre[k]])
+
+    # Primer grupo cuyo nombre no es menor que el dado (búsqueda binaria)
+    def _grupo(self, nombre):
+        return bisect_left(range(self.distintos), nombre, key=self._nombre_grupo)
+
+    # Posiciones de los nodos con ese nombre, sin cargar ningún directorio.
+    # Devuelve una copia para no retener vistas del mapa (impedirían cerrarlo).
+    def posiciones(self, nombre):
+        k = self._grupo(nombre)
+        if k == self.distintos or self._nombre_grupo(k) != nombre:
+            return []
+        return self._por_nombre[self._inicios_nombre[k]:self._inicios_nombre[k + 1]].tolist()
+
+    # Lista de grupos que contienen un trigrama (vacía si ningún nombre lo tiene)
+    def _lista_trigrama(self, trigrama):
+        clave = _clave_trigrama(trigrama)
+        i = bisect_left(self._claves_trigrama, clave)
+        if i == self.num_trigramas or self._claves_trigrama[i] != clave:
+            return ()
+        return self._ids_trigrama[self._inicios_trigrama[i]:self._inicios_trigrama[i + 1]]
+
+    # Genera los nombres distintos que cumplen un patrón. Como en IndiceFS, los
+    # candidatos salen de intersecar las listas de trigramas guardadas; un patrón
+    # sin trigramas se acota con su prefijo literal por búsqueda binaria.
+    def nombres_por_patron(self, patron):
+        if not any(c in patron for c in "*?["):
+            patron = f"*{patron}*"
+        coincide = re.compile(translate(patron)).match
+        listas = [self._lista_trigrama(t) for t in _trigramas_patron(patron)]
+        if listas:
+            candidatos = list(_interseccion(listas))  # Copia: no retiene vistas del mapa
+        else:
+            prefijo = re.match(r"[^*?\[]*", patron).group()
+            desde = self._grupo(prefijo)
+            hasta = self._grupo(prefijo + "\U0010ffff") if prefijo else self.distintos
+            candidatos = range(desde, hasta)
+        for k in candidatos:
+            nombre = self._nombre_grupo(k)
+            if coincide(nombre):
+                yield nombre
+
+    # Indica si una posición está en el subárbol de otra. En orden de anchura
+    # los ancestros tienen posiciones menores, así que se sube solo hasta pasarla.
+    def _dentro_de(self, posicion, ancestro):
+        while posicion > ancestro:
+            posicion = self._padres[posicion]
+        return posicion == ancestro
+
+    # Elemento de una posición, cargando solo los directorios de su ruta
+    def elemento_en(self, posicion):
+        ruta = []
+        while posicion:
+            ruta.append(posicion)
+            posicion = self._padres[posicion]
+        elemento = self.raiz()
+        for posicion in reversed(ruta):
+            elemento = elemento.entradas[self.nombre(posicion)]
+        return elemento
+
+    # Genera los elementos con ese nombre dentro del subárbol de la posición indicada.
+    # Refleja el contenido de la instantánea, no los cambios hechos después en memoria.
+    def elementos_por_nombre(self, nombre, dentro=0):
+        for posicion in self.posiciones(nombre):
+            if self._dentro_de(posicion, dentro):
+                yield self.elemento_en(posicion)
+
+    # Materializa el árbol completo (las búsquedas no lo necesitan: usan el índice de nombres)
+    def materializar(self):
+        raiz = self.raiz()
+        for _ in recorrer_preorden(raiz):
+            pass
+        return raiz
+
+# Directorio respaldado por una instantánea: carga sus hijos la primera vez que se usan.
+# Sus acumulados vienen de la instantánea, así que los hijos se enlazan sin volver a sumarlos.
+# Las búsquedas usan el índice de nombres de la instantánea, así que el índice en
+# memoria no calcula trigramas de los hijos que se van cargando.
+class DirectorioInstantanea(Directorio):
+    TRIGRAMAS = False
+
+    def __init__(self, instantanea, posicion):
+        self._instantanea = instantanea
+        self._posicion = posicion
+        self._cargado = False
+        super().__init__(instantanea.nombre(posicion))
+        self.tamano_total = instantanea._tamanos[posicion]
+        self.num_archivos = instantanea._archivos[posicion]
+
+    @property
+    def entradas(self):
+        if not self._cargado:
+            self._cargado = True
+            instantanea = self._instantanea
+            primero = instantanea._primeros[self._posicion]
+            for posicion in range(primero, primero + instantanea._cantidades[self._posicion]):
+                self._enlazar(instantanea.elemento(posicion))
+        return self._entradas
+
+    @entradas.setter
+    def entradas(self, valor):
+        self._entradas = valor
+
+    # Mientras no se ha cargado, la cantidad de hijos sale de la instantánea
+    def tiene_hijos(self):
+        if not self._cargado:
+            return self._instantanea._cantidades[self._posicion] > 0
+        return bool(self._entradas)
+
+# Lista un directorio real (se ejecuta en los hilos del escáner)
+def _listar_directorio(directorio, ruta, nivel, excluir, enlaces):
+    entradas = []
+    try:
+        estado = os.stat(ruta)  # Se toma antes de listar: un cambio durante el listado se verá en el próximo refresco
+        with os.scandir(ruta) as iterador:
+            for entrada in iterador:
+                if any(fnmatch(entrada.name, patron) or fnmatch(entrada.path, patron) for patron in excluir):
+                    continue
+                try:
+                    es_enlace = entrada.is_symlink()
+                    if es_enlace and enlaces == "ignorar":
+                        continue
+                    es_dir = entrada.is_dir(follow_symlinks=enlaces == "seguir")
+                    clave = None
+                    inodo = entrada.inode()
+                    tamano = mtime = None
+                    if not es_dir:
+                        info = entrada.stat(follow_symlinks=False)
+                        tamano, mtime = info.st_size, info.st_mtime_ns
+                    if es_dir and enlaces == "seguir":
+                        # Identidad real del directorio para no entrar dos veces (ciclos de enlaces)
+                        info = entrada.stat()
+                        clave = (info.st_dev, info.st_ino)
+                except OSError:
+                    continue  # La entrada desapareció o no se puede consultar
+                entradas.append((entrada.name, es_dir, entrada.path, clave, inodo, tamano, mtime))
+    except OSError as e:
+        return directorio, nivel, entradas, str(e), None
+    return directorio, nivel, entradas, None, estado
+
+# Construye un árbol Directorio/Archivo a partir de una ruta real del disco
+def escanear_directorio(ruta, profundidad_maxima=None, excluir=(), enlaces="ignorar", trabajadores=8, progreso=None):
+    """
+    Lista los directorios en paralelo con un grupo de hilos y va agregando los
+    elementos al árbol a medida que llegan.
+    - profundidad_maxima: niveles de directorios que se listan (None = sin límite).
+    - excluir: patrones tipo '*.tmp' o '*/node_modules' comparados con el nombre y la ruta.
+    - enlaces: 'ignorar' los enlaces simbólicos, tratarlos como 'archivo' o 'seguir'los.
+    - progreso: función opcional que recibe (entradas, segundos) tras cada directorio.
+    Retorna la raíz y un diccionario de estadísticas (incluye entradas por segundo).
+    """
+    if enlaces not in ("ignorar", "archivo", "seguir"):
+        raise ValueError("La política de enlaces debe ser 'ignorar', 'archivo' o 'seguir'.")
+    if not os.path.isdir(ruta):
+        raise ValueError(f"'{ruta}' no es un directorio.")
+    ruta = os.path.abspath(ruta)
+    raiz = Directorio(os.path.basename(ruta))
+    estadisticas = {"directorios": 1, "archivos": 0, "errores": []}
+    vistos = set()  # Directorios ya listados cuando se siguen enlaces
+    if enlaces == "seguir":
+        info = os.stat(ruta)
+        vistos.add((info.st_dev, info.st_ino))
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=trabajadores) as grupo:
+        pendientes = {grupo.submit(_listar_directorio, raiz, ruta, 0, excluir, enlaces)}
+        while pendientes:
+            terminados, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                directorio, nivel, entradas, error, estado = futuro.result()
+                if error:
+                    estadisticas["errores"].append(error)
+                else:
+                    # Se recuerda el estado del directorio para los refrescos incrementales
+                    directorio.mtime, directorio.inodo = estado.st_mtime_ns, estado.st_ino
+                # Solo este hilo modifica el árbol, así los índices no necesitan bloqueos
+                for nombre, es_dir, ruta_hijo, clave, inodo, tamano, mtime in entradas:
+                    if not es_dir:
+                        archivo = Archivo(nombre, tamano, mtime)
+                        archivo.inodo = inodo
+                        directorio.agregar(archivo)
+                        estadisticas["archivos"] += 1
+                        continue
+                    if clave is not None:
+                        if clave in vistos:
+                            continue
+                        vistos.add(clave)
+                    hijo = Directorio(nombre)
+                    hijo.inodo = inodo
+                    directorio.agregar(hijo)
+                    estadisticas["directorios"] += 1
+                    if profundidad_maxima is None or nivel + 1 < profundidad_maxima:
+                        pendientes.add(grupo.submit(_listar_directorio, hijo, ruta_hijo, nivel + 1, excluir, enlaces))
+                if progreso:
+                    progreso(estadisticas["directorios"] + estadisticas["archivos"], time.perf_counter() - inicio)
+
+    segundos = time.perf_counter() - inicio
+    estadisticas["entradas"] = estadisticas["directorios"] + estadisticas["archivos"]
+    estadisticas["segundos"] = segundos
+    estadisticas["entradas_por_segundo"] = estadisticas["entradas"] / segundos if segundos else 0.0
+    return raiz, estadisticas
+
+# Actualiza un árbol escaneado volviendo a listar solo los directorios cuyo mtime o inodo cambió
+def refrescar_directorio(raiz, ruta, profundidad_maxima=None, excluir=(), enlaces="ignorar",
+                         entradas_por_segundo=None, revisar_archivos=False):
+    """
+    Los directorios sin cambios solo se consultan con stat (su mtime no cambia
+    cuando cambia algo más abajo, por eso se revisan sus subdirectorios). Los
+    cambiados se listan y se comparan con el árbol: las altas y bajas se aplican
+    con agregar/quitar y un inodo que reaparece con otro nombre es un renombrado.
+    Con las entradas por segundo del escaneo inicial se estima el tiempo ahorrado.
+    Límite: un archivo que crece o se reescribe en su sitio no cambia el mtime de
+    su directorio, así que por defecto su tamaño (y los acumulados) no se actualiza;
+    el reporte cuenta esos archivos en "archivos_sin_revisar". Con
+    revisar_archivos=True se hace stat de cada archivo de los directorios sin cambios.
+    """
+    inicio = time.perf_counter()
+    estadisticas = {"agregados": 0, "eliminados": 0, "renombrados": 0, "modificados": 0,
+                    "revisados": 0, "listados": 0, "archivos_sin_revisar": 0, "errores": []}
+    entradas_listadas, segundos_listando = 0, 0.0
+    pila = [(raiz, os.path.abspath(ruta), 0)]
+    while pila:
+        directorio, ruta_dir, nivel = pila.pop()
+        if profundidad_maxima is not None and nivel >= profundidad_maxima:
+            continue
+        estadisticas["revisados"] += 1
+        try:
+            estado = os.stat(ruta_dir)
+        except OSError:
+            continue  # Ha desaparecido: lo quitará el listado de su directorio padre
+        if (estado.st_mtime_ns, estado.st_ino) != (directorio.mtime, directorio.inodo):
+            antes = time.perf_counter()
+            _, _, entradas, error, estado = _listar_directorio(directorio, ruta_dir, nivel, excluir, enlaces)
+            segundos_listando += time.perf_counter() - antes
+            entradas_listadas += len(entradas)
+            estadisticas["listados"] += 1
+            if error:
+                estadisticas["errores"].append(error)
+                continue
+            directorio.mtime, directorio.inodo = estado.st_mtime_ns, estado.st_ino
+            _aplicar_cambios(directorio, nivel, entradas, estadisticas, profundidad_maxima, excluir, enlaces)
+        elif revisar_archivos:
+            _revisar_archivos(directorio, ruta_dir, estadisticas)
+        else:
+            estadisticas["archivos_sin_revisar"] += sum(1 for hijo in directorio.hijos if isinstance(hijo, Archivo))
+        # Los subdirectorios se revisan aunque este no haya cambiado
+        for hijo in directorio.hijos:
+            if isinstance(hijo, Directorio):
+                pila.append((hijo, os.path.join(ruta_dir, hijo.nombre), nivel + 1))
+
+    segundos = time.perf_counter() - inicio
+    if entradas_por_segundo is None and segundos_listando:
+        entradas_por_segundo = entradas_listadas / segundos_listando
+    completo = raiz.indice.total / entradas_por_segundo if entradas_por_segundo else None
+    estadisticas["cambios"] = sum(estadisticas[clave] for clave in ("agregados", "eliminados", "renombrados", "modificados"))
+    estadisticas["segundos"] = segundos
+    estadisticas["segundos_escaneo_completo"] = completo
+    estadisticas["segundos_ahorrados"] = completo - segundos if completo is not None else None
+    return estadisticas
+
+# Actualiza tamaño y fecha de los archivos de un directorio sin cambios (crecen en su sitio)
+def _revisar_archivos(directorio, ruta_dir, estadisticas):
+    for archivo in [hijo for hijo in directorio.hijos if isinstance(hijo, Archivo)]:
+        try:
+            info = os.stat(os.path.join(ruta_dir, archivo.nombre), follow_symlinks=False)
+        except OSError:
+            continue  # Si desapareció, el mtime del directorio cambió y se verá al listarlo
+        if (archivo.tamano, archivo.mtime) != (info.st_size, info.st_mtime_ns):
+            directorio.actualizar_archivo(archivo.nombre, info.st_size, info.st_mtime_ns)
+            estadisticas["modificados"] += 1
+
+# Compara el listado actual de un directorio con sus hijos y aplica las diferencias
+def _aplicar_cambios(directorio, nivel, entradas, estadisticas, profundidad_maxima, excluir, enlaces):
+    actuales = {nombre: (es_dir, ruta_hijo, inodo, tamano, mtime)
+                for nombre, es_dir, ruta_hijo, _, inodo, tamano, mtime in entradas}
+    # Desaparecidos: ya no están o cambiaron de tipo (archivo <-> directorio)
+    desaparecidos = {
+        nombre: elemento for nombre, elemento in directorio.entradas.items()
+        if nombre not in actuales or actuales[nombre][0] != isinstance(elemento, Directorio)
+    }
+    nuevos = [nombre for nombre in actuales if nombre not in directorio.entradas or nombre in desaparecidos]
+    por_inodo = {e.inodo: nombre for nombre, e in desaparecidos.items() if e.inodo is not None}
+
+    # Renombrados: mismo inodo y tipo con un nombre libre
+    pendientes = []
+    for nombre in nuevos:
+        es_dir, _, inodo, _, _ = actuales[nombre]
+        anterior = por_inodo.pop(inodo, None)
+        if (anterior is not None and nombre not in directorio.entradas
+                and isinstance(desaparecidos[anterior], Directorio) == es_dir):
+            directorio.renombrar(anterior, nombre)
+            del desaparecidos[anterior]
+            estadisticas["renombrados"] += 1
+        else:
+            pendientes.append(nombre)
+
+    for nombre in desaparecidos:
+        quitado = directorio.quitar(nombre)
+        estadisticas["eliminados"] += quitado.indice.total if isinstance(quitado, Directorio) else 1
+
+    # Archivos que siguen en su sitio pero cambiaron de tamaño o fecha
+    for nombre, (es_dir, _, _, tamano, mtime) in actuales.items():
+        elemento = directorio.entradas.get(nombre)
+        if not es_dir and isinstance(elemento, Archivo) and (elemento.tamano, elemento.mtime) != (tamano, mtime):
+            directorio.actualizar_archivo(nombre, tamano, mtime)
+            estadisticas["modificados"] += 1
+
+    for nombre in pendientes:
+        es_dir, ruta_hijo, inodo, tamano, mtime = actuales[nombre]
+        if not es_dir:
+            nuevo = Archivo(nombre, tamano, mtime)
+            nuevo.inodo = inodo
+            estadisticas["agregados"] += 1
+        elif profundidad_maxima is not None and nivel + 1 >= profundidad_maxima:
+            nuevo = Directorio(nombre)  # Más allá de la profundidad: no se lista
+            nuevo.inodo = inodo
+            estadisticas["agregados"] += 1
+        else:
+            restante = None if profundidad_maxima is None else profundidad_maxima - nivel - 1
+            nuevo, escaneo = escanear_directorio(ruta_hijo, restante, excluir, enlaces)
+            nuevo.nombre = nombre  # Coincide con el nombre base salvo en rutas especiales
+            estadisticas["agregados"] += escaneo["entradas"]
+            estadisticas["errores"].extend(escaneo["errores"])
+        directorio.agregar(nuevo)
+
+# Treeview que se llena bajo demanda: cada directorio inserta sus hijos inmediatos
+# solo cuando se expande, y mientras tanto muestra un hijo marcador para que
+# aparezca el indicador de expansión.
+class TreeviewPerezoso:
+    MARCADOR = "marcador"  # Etiqueta de los items de relleno
+
+    def __init__(self, tree, raiz, padre=""):
+        self.tree = tree
+        self.elementos = {}  # Id de item -> elemento
+        self.items = {}      # Elemento -> id de item (solo los ya insertados)
+        self.tree.bind("<<TreeviewOpen>>", self._al_abrir, add="+")
+        self.item_raiz = self._insertar(padre, raiz)
+        self.expandir(self.item_raiz)
+        self.tree.item(self.item_raiz, open=True)
+
+    # Inserta un elemento (si es un directorio con contenido, con su marcador).
+    # Las columnas muestran los acumulados ya calculados, sin recorrer el subárbol.
+    def _insertar(self, padre, elemento):
+        if isinstance(elemento, Directorio):
+            valores = (formato_tamano(elemento.tamano_total), elemento.num_archivos)
+        else:
+            valores = (formato_tamano(elemento.tamano), "")
+        # Si el nombre es vacío, muestra 'raiz'
+        item = self.tree.insert(padre, "end", text=elemento.nombre if elemento.nombre else "raiz", values=valores)
+        self.elementos[item] = elemento
+        self.items[elemento] = item
+        if isinstance(elemento, Directorio) and elemento.tiene_hijos():
+            self.tree.insert(item, "end", text="…", tags=(self.MARCADOR,))
+        return item
+
+    # Sustituye el marcador de un directorio por sus hijos inmediatos (una sola vez)
+    def expandir(self, item):
+        hijos = self.tree.get_children(item)
+        if len(hijos) == 1 and self.MARCADOR in self.tree.item(hijos[0], "tags"):
+            self.tree.delete(hijos[0])
+            for hijo in self.elementos[item].hijos:
+                self._insertar(item, hijo)
+
+    def _al_abrir(self, evento):
+        item = self.tree.focus()  # El item que se está abriendo es el que tiene el foco
+        if item in self.elementos:
+            self.expandir(item)
+
+    # Muestra un elemento expandiendo solo los directorios de su ruta
+    def revelar(self, elemento):
+        ancestros = []
+        actual = elemento
+        while actual is not None and actual not in self.items:
+            ancestros.append(actual)
+            actual = actual.padre
+        if actual is None:
+            return None  # El elemento no pertenece al árbol mostrado
+        item = self.items[actual]
+        for ancestro in reversed(ancestros):
+            self.expandir(item)
+            self.tree.item(item, open=True)
+            item = self.items[ancestro]
+        # Abre también los ancestros que ya estaban insertados pero cerrados
+        padre = self.tree.parent(item)
+        while padre:
+            self.tree.item(padre, open=True)
+            padre = self.tree.parent(padre)
+        self.tree.selection_set(item)
+        self.tree.focus(item)
+        self.tree.see(item)
+        return item
+
+# Tamaño en bytes en formato legible (KB, MB, ...)
+def formato_tamano(tamano):
+    for unidad in ("B", "KB", "MB", "GB", "TB"):
+        if tamano < 1024 or unidad == "TB":
+            return f"{tamano:.0f} {unidad}" if unidad == "B" else f"{tamano:.1f} {unidad}"
+        tamano /= 1024
+
+# Devuelve los k directorios con más bytes acumulados dentro de la raíz (sin incluirla).
+# Un directorio nunca ocupa menos que sus subdirectorios, así que basta con expandir
+# un montículo de máximos desde la raíz: solo se visitan los hijos de los elegidos.
+def mayores_subarboles(raiz, k=10):
+    monticulo = []
+    desempate = count()  # Evita comparar directorios con el mismo tamaño
+
+    def apilar_hijos(directorio):
+        for hijo in directorio.hijos:
+            if isinstance(hijo, Directorio):
+                heapq.heappush(monticulo, (-hijo.tamano_total, next(desempate), hijo))
+
+    apilar_hijos(raiz)
+    mayores = []
+    while monticulo and len(mayores) < k:
+        _, _, directorio = heapq.heappop(monticulo)
+        mayores.append(directorio)
+        apilar_hijos(directorio)
+    return mayores
 
 # Llena el widget Treeview con la estructura del árbol de directorios y archivos
 def llenar_treeview(tree, nodo, padre=""):
-    """Llena el Treeview con la estructura del árbol."""
-    if isinstance(nodo, Directorio):
-        # Inserta el directorio en el Treeview (si el nombre es vacío, muestra 'raiz')
-        item_id = tree.insert(padre, "end", text=nodo.nombre if nodo.nombre else "raiz", open=True)
-        for hijo in nodo.hijos:
-            llenar_treeview(tree, hijo, item_id)  # Llama recursivamente para los hijos
-    elif isinstance(nodo, Archivo):
-        # Inserta el archivo en el Treeview
-        tree.insert(padre, "end", text=nodo.nombre, open=True)
+    """Llena el Treeview con la estructura del árbol (bajo demanda)."""
+    return TreeviewPerezoso(tree, nodo, padre)
+
+# Mide el rendimiento de los recorridos sobre un árbol de directorios muy profundo
+def benchmark_recorridos(profundidad=100_000):
+    raiz = Directorio("")
+    actual = raiz
+    for i in range(profundidad - 2):
+        nuevo = Directorio(f"d{i}")
+        actual.agregar(nuevo)
+        actual = nuevo
+    actual.agregar(Archivo("objetivo.txt"))
+
+    for nombre, recorrido in (("preorden", recorrer_preorden), ("postorden", recorrer_postorden)):
+        inicio = time.perf_counter()
+        visitados = sum(1 for _ in recorrido(raiz))
+        segundos = time.perf_counter() - inicio
+        print(f"Recorrido en {nombre}: {visitados} elementos en {segundos:.3f} s ({visitados / segundos:,.0f} elementos/s)")
+
+    inicio = time.perf_counter()
+    ruta = buscar_ruta_elemento(raiz, "objetivo.txt")
+    print(f"buscar_ruta_elemento: ruta de {len(ruta)} caracteres en {time.perf_counter() - inicio:.3f} s")
+
+# Mide la latencia de las búsquedas con comodines sobre un árbol sintético
+def benchmark_patrones(cantidad=1_000_000):
+    import random
+    random.seed(0)
+    palabras = ["informe", "datos", "foto", "copia", "registro", "nota", "backup", "factura", "proyecto", "video"]
+    extensiones = ["txt", "log", "jpg", "pdf", "csv", "py"]
+    raiz = Directorio("")
+    inicio = time.perf_counter()
+    directorios = [raiz]
+    for i in range(cantidad):
+        if i % 50 == 0:
+            nuevo = Directorio(f"dir{i}")
+            random.choice(directorios).agregar(nuevo)
+            directorios.append(nuevo)
+        else:
+            nombre = f"{random.choice(palabras)}_{random.randrange(10**6)}.{random.choice(extensiones)}"
+            destino = random.choice(directorios)
+            if nombre not in destino.entradas:
+                destino.agregar(Archivo(nombre))
+    print(f"Árbol de {raiz.indice.total} elementos construido en {time.perf_counter() - inicio:.1f} s")
+
+    for patron in ("*.log", "informe*", "*_12345*", "factura_99*.pdf", "9999"):
+        inicio = time.perf_counter()
+        nombres = sum(1 for _ in raiz.indice.nombres_por_patron(patron))
+        segundos = time.perf_counter() - inicio
+        print(f"'{patron}': {nombres} nombres en {segundos * 1000:.2f} ms")
 
 # Función que se ejecuta al presionar el botón "Buscar"
 def buscar_archivo_gui():
     nombre = entry_nombre.get()  # Obtiene el nombre del archivo ingresado por el usuario
-    ruta = buscar_ruta_elemento(raiz, nombre)  # Busca la ruta del archivo
-    if ruta:
-        messagebox.showinfo("Resultado", f"Ruta encontrada:\n{ruta}")  # Muestra la ruta encontrada
+    if "/" in nombre:
+        # Si se escribe una ruta, se resuelve directamente
+        elemento = raiz.resolver(nombre)
+        encontrados = [elemento] if elemento else []
+    elif any(c in nombre for c in "*?["):
+        encontrados = list(islice(buscar_patron(raiz, nombre), 20))  # Búsqueda con comodines
+    else:
+        # Busca los elementos por nombre exacto y, si no hay ninguno, como subcadena (máximo 20)
+        encontrados = list(islice(buscar_elementos(raiz, nombre), 20))
+        if not encontrados and nombre:
+            encontrados = list(islice(buscar_patron(raiz, nombre), 20))
+    rutas = [elemento.ruta() for elemento in encontrados]
+    if rutas:
+        vista.revelar(encontrados[0])  # Expande solo la ruta hasta el primer resultado
+        messagebox.showinfo("Resultado", "Rutas encontradas:\n" + "\n".join(rutas))  # Muestra las rutas encontradas
     else:
         messagebox.showwarning("Resultado", "Elemento no encontrado.")  # Muestra advertencia si no se encuentra
 
+# Muestra los directorios que más espacio ocupan
+def mostrar_mayores_gui():
+    mayores = mayores_subarboles(raiz, 10)
+    if mayores:
+        lineas = [f"{formato_tamano(d.tamano_total)}  {d.ruta()}" for d in mayores]
+        messagebox.showinfo("Mayores directorios", "\n".join(lineas))
+    else:
+        messagebox.showwarning("Mayores directorios", "No hay subdirectorios.")
+
 # Ejemplo de uso:
 if __name__ == "__main__":
-    # Crear estructura de directorios y archivos (árbol)
-    raiz = Directorio("")  # Directorio raíz
+    argumentos = sys.argv[1:]
+    if "--benchmark" in argumentos:
+        benchmark_recorridos()
+        benchmark_patrones()
+    else:
+        if argumentos and os.path.isfile(argumentos[0]):
+            # Si se indica un archivo, se abre como instantánea: los directorios se cargan al expandirlos
+            # y las búsquedas consultan el índice de nombres guardado, sin materializar el árbol
+            raiz = Instantanea(argumentos[0]).raiz()
+        elif argumentos:
+            # Si se indica una ruta, se escanea el disco real
+            raiz, estadisticas = escanear_directorio(argumentos[0])
+            print(f"{estadisticas['entradas']} entradas en {estadisticas['segundos']:.2f} s "
+                  f"({estadisticas['entradas_por_segundo']:,.0f} entradas/s, {len(estadisticas['errores'])} errores)")
+            if len(argumentos) > 1:
+                guardar_instantanea(raiz, argumentos[1])  # Guarda el escaneo para los próximos arranques
+        else:
+            # Crear estructura de directorios y archivos (árbol)
+            raiz = Directorio("")  # Directorio raíz
 
-    home = Directorio("home")  # /home
-    usuario = Directorio("usuario")  # /home/usuario
-    documentos = Directorio("documentos")  # /home/usuario/documentos
-    informe = Archivo("informe.txt")  # /home/usuario/documentos/informe.txt
-    imagen = Archivo("foto.jpg")  # /home/usuario/foto.jpg
+            home = Directorio("home")  # /home
+            usuario = Directorio("usuario")  # /home/usuario
+            documentos = Directorio("documentos")  # /home/usuario/documentos
+            informe = Archivo("informe.txt", 48_200)  # /home/usuario/documentos/informe.txt
+            imagen = Archivo("foto.jpg", 2_350_000)  # /home/usuario/foto.jpg
 
-    documentos.agregar(informe)  # Agrega informe.txt a documentos
-    usuario.agregar(documentos)  # Agrega documentos a usuario
-    usuario.agregar(imagen)      # Agrega foto.jpg a usuario
-    home.agregar(usuario)        # Agrega usuario a home
-    raiz.agregar(home)           # Agrega home a la raíz
+            documentos.agregar(informe)  # Agrega informe.txt a documentos
+            usuario.agregar(documentos)  # Agrega documentos a usuario
+            usuario.agregar(imagen)      # Agrega foto.jpg a usuario
+            home.agregar(usuario)        # Agrega usuario a home
+            raiz.agregar(home)           # Agrega home a la raíz
 
+        # ------------------------Interfaz gráfica mejorada con Treeview--------------------------------------
 
+        ventana = tk.Tk()  # Crea la ventana principal
+        ventana.title("Buscador de Archivos")  # Título de la ventana
+        ventana.geometry("760x320")  # Tamaño de la ventana
+        ventana.configure(bg="#f0f4f7")  # Color de fondo
 
-     # ------------------------Interfaz gráfica mejorada con Treeview--------------------------------------
-    
-    ventana = tk.Tk()  # Crea la ventana principal
-    ventana.title("Buscador de Archivos")  # Título de la ventana
-    ventana.geometry("600x300")  # Tamaño de la ventana
-    ventana.configure(bg="#f0f4f7")  # Color de fondo
+        # Frame principal con borde y color de fondo
+        frame = tk.Frame(ventana, bg="#e3eaf2", bd=2, relief="groove")
+        frame.place(relx=0.5, rely=0.5, anchor="center", width=730, height=290)
 
-    # Frame principal con borde y color de fondo
-    frame = tk.Frame(ventana, bg="#e3eaf2", bd=2, relief="groove")
-    frame.place(relx=0.5, rely=0.5, anchor="center", width=570, height=260)
+        # Título en la parte superior del frame
+        titulo = tk.Label(frame, text="Buscar archivo en sistema de archivos", font=("Arial", 14, "bold"), bg="#e3eaf2")
+        titulo.pack(pady=(10, 5))
 
-    # Título en la parte superior del frame
-    titulo = tk.Label(frame, text="Buscar archivo en sistema de archivos", font=("Arial", 14, "bold"), bg="#e3eaf2")
-    titulo.pack(pady=(10, 5))
+        # Subframe para contener el árbol y el panel de búsqueda
+        subframe = tk.Frame(frame, bg="#e3eaf2")
+        subframe.pack(fill="both", expand=True, padx=10, pady=5)
 
-    # Subframe para contener el árbol y el panel de búsqueda
-    subframe = tk.Frame(frame, bg="#e3eaf2")
-    subframe.pack(fill="both", expand=True, padx=10, pady=5)
+        # Treeview para mostrar el árbol de directorios y archivos
+        tree = ttk.Treeview(subframe, columns=("tamano", "archivos"))
+        tree.heading("#0", text="Nombre")
+        tree.heading("tamano", text="Tamaño")
+        tree.heading("archivos", text="Archivos")
+        tree.column("#0", width=150)
+        tree.column("tamano", width=70, anchor="e")
+        tree.column("archivos", width=60, anchor="e")
+        tree.pack(side="left", fill="y", padx=(0, 10), pady=5)
+        vista = llenar_treeview(tree, raiz)  # Llena el Treeview con la estructura del árbol
 
-    # Treeview para mostrar el árbol de directorios y archivos
-    tree = ttk.Treeview(subframe)
-    tree.pack(side="left", fill="y", padx=(0, 10), pady=5)
-    llenar_treeview(tree, raiz)  # Llena el Treeview con la estructura del árbol
+        # Panel de búsqueda a la derecha del árbol
+        panel_busqueda = tk.Frame(subframe, bg="#e3eaf2")
+        panel_busqueda.pack(side="left", fill="both", expand=True)
 
-    # Panel de búsqueda a la derecha del árbol
-    panel_busqueda = tk.Frame(subframe, bg="#e3eaf2")
-    panel_busqueda.pack(side="left", fill="both", expand=True)
+        # Etiqueta y campo de entrada para el nombre del archivo
+        tk.Label(panel_busqueda, text="Nombre del archivo:", font=("Arial", 11), bg="#e3eaf2").pack(pady=5)
+        entry_nombre = tk.Entry(panel_busqueda, font=("Arial", 11), width=30)
+        entry_nombre.pack(pady=5)
 
-    # Etiqueta y campo de entrada para el nombre del archivo
-    tk.Label(panel_busqueda, text="Nombre del archivo:", font=("Arial", 11), bg="#e3eaf2").pack(pady=5)
-    entry_nombre = tk.Entry(panel_busqueda, font=("Arial", 11), width=30)
-    entry_nombre.pack(pady=5)
+        # Botón para buscar el archivo
+        btn_buscar = tk.Button(panel_busqueda, text="Buscar", font=("Arial", 11, "bold"), bg="#4a90e2", fg="white", command=buscar_archivo_gui)
+        btn_buscar.pack(pady=15)
 
-    # Botón para buscar el archivo
-    btn_buscar = tk.Button(panel_busqueda, text="Buscar", font=("Arial", 11, "bold"), bg="#4a90e2", fg="white", command=buscar_archivo_gui)
-    btn_buscar.pack(pady=15)
+        # Botón para ver los directorios que más ocupan
+        btn_mayores = tk.Button(panel_busqueda, text="Mayores directorios", font=("Arial", 11, "bold"), bg="#4a90e2", fg="white", command=mostrar_mayores_gui)
+        btn_mayores.pack()
 
-    ventana.mainloop()  # Inicia el bucle principal de la interfaz gráfica
\ No newline at end of file
+        ventana.mainloop()  # Inicia el bucle principal de la interfaz gráfica
\ No newline at end of file
@@ -1,6 +1,21 @@
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
 import tkinter as tk
+from array import array
+from collections import OrderedDict
 from tkinter import messagebox
 
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él, evaluar_lote recorre las sesiones en Python
+    np = None
+
 # -------------------- BLOQUE DE LÓGICA --------------------
 # Árbol de decisiones representado como diccionario anidado
 decision_tree = {
@@ -70,12 +85,786 @@ decision_tree = {
     }
 }
 
+# -------------------- COMPILACIÓN A TABLAS PLANAS --------------------
+# El diccionario anidado se convierte en arreglos indexados por número de nodo:
+#   pregunta[n]     -> id del texto de la pregunta (-1 si el nodo es un diagnóstico)
+#   diagnostico[n]  -> id del texto del diagnóstico (-1 si el nodo es una pregunta)
+#   siguiente[n * R + r] -> nodo al que lleva la respuesta r (-1 si no existe)
+# donde R es el número de respuestas distintas del árbol. El nodo 0 es la raíz.
+# Un nodo sin pregunta ni diagnóstico es una referencia {"$ref": id} a un subárbol
+# guardado en otro archivo de una BaseConocimiento (ver referencias).
+# Los índices derivados (padre de cada nodo, rutas por diagnóstico) se guardan en
+# caché junto con la versión del árbol; cada edición incrementa la versión.
+class ArbolCompilado:
+    def __init__(self):
+        self.textos = []        # Id -> texto (preguntas y diagnósticos)
+        self.respuestas = []    # Código -> texto de la respuesta ("Sí", "No", ...)
+        self.pregunta = array("i")
+        self.diagnostico = array("i")
+        self.siguiente = array("i")
+        self.version = 0
+        self._ids_texto = {}
+        self._codigos = {}      # Texto de la respuesta -> código
+        self._indices = None    # (versión, padre, entrada, hojas_por_diagnostico, inalcanzables)
+        self.referencias = {}   # Nodo -> id del subárbol externo al que apunta
+
+    def _id_texto(self, texto):
+        if texto not in self._ids_texto:
+            self._ids_texto[texto] = len(self.textos)
+            self.textos.append(texto)
+        return self._ids_texto[texto]
+
+    # Código de una respuesta; si es nueva, ensancha la tabla de transiciones
+    def _codigo_respuesta(self, respuesta):
+        if respuesta not in self._codigos:
+            ancho = len(self.respuestas)
+            tabla = array("i")
+            for nodo in range(self.num_nodos):
+                tabla.extend(self.siguiente[nodo * ancho:(nodo + 1) * ancho])
+                tabla.append(-1)
+            self.siguiente = tabla
+            self._codigos[respuesta] = ancho
+            self.respuestas.append(respuesta)
+        return self._codigos[respuesta]
+
+    def codigo(self, respuesta):
+        return self._codigos.get(respuesta)
+
+    def _nuevo_nodo(self, pregunta=-1, diagnostico=-1):
+        self.pregunta.append(pregunta)
+        self.diagnostico.append(diagnostico)
+        self.siguiente.extend(array("i", [-1]) * len(self.respuestas))
+        return self.num_nodos - 1
+
+    @property
+    def num_nodos(self):
+        return len(self.pregunta)
+
+    def es_diagnostico(self, nodo):
+        return self.diagnostico[nodo] >= 0
+
+    def es_referencia(self, nodo):
+        return nodo in self.referencias
+
+    # Texto de la pregunta o del diagnóstico de un nodo (o id del subárbol referenciado)
+    def texto(self, nodo):
+        if nodo in self.referencias:
+            return self.referencias[nodo]
+        ident = self.diagnostico[nodo]
+        return self.textos[ident if ident >= 0 else self.pregunta[nodo]]
+
+    # Memoria aproximada que ocupan las tablas y los textos (para el presupuesto de caché)
+    def tamano_memoria(self):
+        tamano = sum(tabla.itemsize * len(tabla) for tabla in (self.pregunta, self.diagnostico, self.siguiente))
+        tamano += sum(sys.getsizeof(texto) for texto in self.textos)
+        return tamano + sys.getsizeof(self._ids_texto) + sys.getsizeof(self.referencias)
+
+    # Respuestas válidas en un nodo, como pares (código, texto)
+    def opciones(self, nodo):
+        base = nodo * len(self.respuestas)
+        return [(codigo, texto) for codigo, texto in enumerate(self.respuestas)
+                if self.siguiente[base + codigo] >= 0]
+
+    # Nodo al que lleva una respuesta (por código) o None si no es válida
+    def siguiente_nodo(self, nodo, codigo):
+        if not 0 <= codigo < len(self.respuestas):
+            return None
+        destino = self.siguiente[nodo * len(self.respuestas) + codigo]
+        return destino if destino >= 0 else None
+
+    # Nodo al que llevan una serie de respuestas desde la raíz, o None
+    def nodo_de_ruta(self, ruta):
+        nodo = 0
+        for respuesta in ruta:
+            codigo = self.codigo(respuesta)
+            nodo = None if codigo is None else self.siguiente_nodo(nodo, codigo)
+            if nodo is None:
+                return None
+        return nodo
+
+    # ---- Edición: cada operación invalida los índices derivados ----
+    def _editado(self):
+        self.version += 1
+        self._indices = None
+
+    def _exigir_diagnostico(self, nodo):
+        if not 0 <= nodo < self.num_nodos or not self.es_diagnostico(nodo):
+            raise ValueError(f"El nodo {nodo} no es un diagnóstico.")
+
+    # Cambia el texto de un diagnóstico
+    def cambiar_diagnostico(self, nodo, texto):
+        self._exigir_diagnostico(nodo)
+        self.diagnostico[nodo] = self._id_texto(texto)
+        self._editado()
+
+    # Convierte un diagnóstico en pregunta; opciones es {respuesta: diagnóstico}
+    def agregar_pregunta(self, nodo, pregunta, opciones):
+        self._exigir_diagnostico(nodo)
+        if not opciones:
+            raise ValueError("Una pregunta necesita al menos una respuesta.")
+        codigos = [self._codigo_respuesta(respuesta) for respuesta in opciones]
+        hijos = [self._nuevo_nodo(diagnostico=self._id_texto(texto)) for texto in opciones.values()]
+        self.pregunta[nodo] = self._id_texto(pregunta)
+        self.diagnostico[nodo] = -1
+        base = nodo * len(self.respuestas)
+        for codigo, hijo in zip(codigos, hijos):
+            self.siguiente[base + codigo] = hijo
+        self._editado()
+        return hijos
+
+    # Convierte una pregunta en diagnóstico; su subárbol queda inalcanzable
+    def podar(self, nodo, diagnostico):
+        if not 0 <= nodo < self.num_nodos or self.es_diagnostico(nodo):
+            raise ValueError(f"El nodo {nodo} no es una pregunta.")
+        self.pregunta[nodo] = -1
+        self.diagnostico[nodo] = self._id_texto(diagnostico)
+        base = nodo * len(self.respuestas)
+        for codigo in range(len(self.respuestas)):
+            self.siguiente[base + codigo] = -1
+        self._editado()
+
+    # ---- Índices derivados, recalculados en una sola pasada desde la raíz ----
+    def indices(self):
+        if self._indices is not None and self._indices[0] == self.version:
+            return self._indices
+        ancho = len(self.respuestas)
+        padre = array("i", [-1]) * self.num_nodos
+        entrada = array("i", [-1]) * self.num_nodos  # Código de la respuesta que llega al nodo
+        alcanzado = bytearray(self.num_nodos)
+        hojas_por_diagnostico = {}
+        pila = [0] if self.num_nodos else []
+        while pila:
+            nodo = pila.pop()
+            alcanzado[nodo] = 1
+            if self.diagnostico[nodo] >= 0:
+                hojas_por_diagnostico.setdefault(self.texto(nodo), []).append(nodo)
+                continue
+            base = nodo * ancho
+            for codigo in range(ancho - 1, -1, -1):
+                hijo = self.siguiente[base + codigo]
+                if hijo >= 0:
+                    padre[hijo] = nodo
+                    entrada[hijo] = codigo
+                    pila.append(hijo)
+        inalcanzables = [nodo for nodo in range(self.num_nodos) if not alcanzado[nodo]]
+        self._indices = (self.version, padre, entrada, hojas_por_diagnostico, inalcanzables)
+        return self._indices
+
+    def padre(self, nodo):
+        anterior = self.indices()[1][nodo]
+        return anterior if anterior >= 0 else None
+
+    # Respuestas que llevan desde la raíz hasta el nodo, en O(profundidad)
+    def ruta(self, nodo):
+        _, padre, entrada, _, _ = self.indices()
+        ruta = []
+        while nodo > 0 and padre[nodo] >= 0:
+            ruta.append(self.respuestas[entrada[nodo]])
+            nodo = padre[nodo]
+        ruta.reverse()
+        return ruta
+
+    # Todas las combinaciones de respuestas que terminan en un diagnóstico
+    def rutas_diagnostico(self, texto):
+        return [self.ruta(hoja) for hoja in self.indices()[3].get(texto, ())]
+
+    # Diagnósticos alcanzables por más de un camino: {texto: [nodos hoja]}
+    def diagnosticos_duplicados(self):
+        return {texto: hojas for texto, hojas in self.indices()[3].items() if len(hojas) > 1}
+
+    # Nodos que ya no se alcanzan desde la raíz (p. ej. tras podar)
+    def inalcanzables(self):
+        return list(self.indices()[4])
+
+# Un subárbol externo se escribe {"$ref": "id"} en lugar de la pregunta
+def es_referencia(nodo):
+    return isinstance(nodo, dict) and len(nodo) == 1 and isinstance(nodo.get("$ref"), str)
+
+# Compila un árbol de decisiones anidado ({pregunta: {respuesta: subárbol o diagnóstico}})
+def compilar_arbol(arbol):
+    compilado = ArbolCompilado()
+    codigos = compilado._codigos
+
+    # Primera pasada: vocabulario de respuestas (define el ancho de la tabla)
+    pila = [arbol]
+    while pila:
+        nodo = pila.pop()
+        if isinstance(nodo, dict):
+            if len(nodo) != 1:
+                raise ValueError("Cada nodo de pregunta debe tener exactamente una pregunta.")
+            if es_referencia(nodo):
+                continue
+            for respuesta, hijo in next(iter(nodo.values())).items():
+                codigos.setdefault(respuesta, len(codigos))
+                pila.append(hijo)
+        elif not isinstance(nodo, str):
+            raise TypeError("Los nodos deben ser diccionarios (preguntas) o cadenas (diagnósticos).")
+    compilado.respuestas = list(codigos)
+    ancho = len(codigos)
+
+    # Segunda pasada en anchura: asigna números de nodo y llena las tablas
+    pendientes = [arbol]
+    i = 0
+    while i < len(pendientes):
+        nodo = pendientes[i]
+        fila = array("i", [-1]) * ancho
+        if isinstance(nodo, str):
+            compilado.pregunta.append(-1)
+            compilado.diagnostico.append(compilado._id_texto(nodo))
+        elif es_referencia(nodo):
+            compilado.pregunta.append(-1)
+            compilado.diagnostico.append(-1)
+            compilado.referencias[i] = nodo["$ref"]
+        else:
+            pregunta, opciones = next(iter(nodo.items()))
+            compilado.pregunta.append(compilado._id_texto(pregunta))
+            compilado.diagnostico.append(-1)
+            for respuesta, hijo in opciones.items():
+                fila[codigos[respuesta]] = len(pendientes)
+                pendientes.append(hijo)
+        compilado.siguiente.extend(fila)
+        pendientes[i] = None  # Libera la referencia al subárbol ya compilado
+        i += 1
+    compilado.indices()  # Precalcula padres y rutas por diagnóstico
+    return compilado
+
+# Intérprete sin interfaz que recorre un árbol compilado respuesta a respuesta.
+# Con una base de conocimiento, al llegar a una referencia carga el subárbol y
+# continúa desde su raíz.
+class InterpreteDecision:
+    def __init__(self, compilado, base=None):
+        self.raiz = compilado
+        self.base = base
+        self.reiniciar()
+
+    def reiniciar(self):
+        self._seguir_referencias(self.raiz, 0)
+
+    # Fija la posición tras seguir las referencias; si un subárbol no se puede
+    # cargar, el intérprete se queda donde estaba. Una cadena de referencias que
+    # vuelve a un id ya visitado (A -> B -> A) no lleva a ninguna pregunta.
+    def _seguir_referencias(self, compilado, nodo):
+        visitados = set()
+        while compilado.es_referencia(nodo):
+            id_subarbol = compilado.texto(nodo)
+            if self.base is None:
+                raise ValueError(f"El subárbol '{id_subarbol}' necesita una base de conocimiento.")
+            if id_subarbol in visitados:
+                raise ValueError(f"Referencia circular entre subárboles: '{id_subarbol}'.")
+            visitados.add(id_subarbol)
+            compilado = self.base.cargar(id_subarbol)
+            nodo = 0
+        self.compilado, self.nodo = compilado, nodo
+
+    def terminado(self):
+        return self.compilado.es_diagnostico(self.nodo)
+
+    def texto(self):
+        return self.compilado.texto(self.nodo)
+
+    def opciones(self):
+        return self.compilado.opciones(self.nodo)
+
+    # Avanza con una respuesta (texto o código); lanza ValueError si no es válida
+    def responder(self, respuesta):
+        codigo = respuesta
+        if isinstance(respuesta, str):
+            codigo = self.compilado.codigo(respuesta)
+        destino = None if codigo is None else self.compilado.siguiente_nodo(self.nodo, codigo)
+        if destino is None:
+            raise ValueError(f"Respuesta no válida: '{respuesta}'.")
+        self._seguir_referencias(self.compilado, destino)
+        return self.nodo
+
+# -------------------- BASES DE CONOCIMIENTO EN JSON --------------------
+# Una base es un directorio de archivos <id>.json con árboles anidados; cualquier
+# subárbol puede sustituirse por {"$ref": "otro_id"}, que apunta a <otro_id>.json.
+# Los subárboles se cargan y compilan al llegar a ellos, y los usados recientemente
+# se conservan en una caché LRU limitada por memoria. La validación de esquema se
+# hace una sola vez por contenido: los hashes válidos se guardan en ARCHIVO_VALIDADOS.
+ARCHIVO_VALIDADOS = ".validados.json"
+PATRON_ID = re.compile(r"[\w-][\w.-]*")
+
+# Comprueba la forma de un árbol leído de JSON; lanza ValueError con la ruta del error
+def validar_arbol(arbol, origen="árbol"):
+    pila = [(arbol, "raíz")]
+    while pila:
+        nodo, donde = pila.pop()
+        if isinstance(nodo, str):
+            if not nodo:
+                raise ValueError(f"{origen}: diagnóstico vacío en {donde}.")
+            continue
+        if es_referencia(nodo):
+            if not PATRON_ID.fullmatch(nodo["$ref"]):
+                raise ValueError(f"{origen}: id de subárbol no válido en {donde}: '{nodo['$ref']}'.")
+            continue
+        if not isinstance(nodo, dict) or len(nodo) != 1:
+            raise ValueError(f"{origen}: {donde} debe ser un diagnóstico, una referencia o una sola pregunta.")
+        pregunta, opciones = next(iter(nodo.items()))
+        if not pregunta or not isinstance(opciones, dict) or not opciones:
+            raise ValueError(f"{origen}: la pregunta '{pregunta}' necesita al menos una respuesta.")
+        for respuesta, hijo in opciones.items():
+            if not respuesta:
+                raise ValueError(f"{origen}: respuesta vacía en '{pregunta}'.")
+            pila.append((hijo, f"{pregunta} -> {respuesta}"))
+
+class BaseConocimiento:
+    def __init__(self, ruta, presupuesto=64 * 2**20):
+        self.directorio = os.path.dirname(os.path.abspath(ruta))
+        self.id_raiz = os.path.splitext(os.path.basename(ruta))[0]
+        self.presupuesto = presupuesto  # Bytes máximos de subárboles compilados en caché
+        self.ocupado = 0
+        self.cache = OrderedDict()      # Id -> ArbolCompilado, del menos al más reciente
+        self.cargas = 0                 # Archivos leídos (no servidos desde la caché)
+        self._ruta_validados = os.path.join(self.directorio, ARCHIVO_VALIDADOS)
+        try:
+            with open(self._ruta_validados, encoding="utf-8") as archivo:
+                self.validados = set(json.load(archivo))
+        except (OSError, ValueError):
+            self.validados = set()
+
+    def raiz(self):
+        return self.cargar(self.id_raiz)
+
+    # Devuelve el subárbol compilado con ese id, leyéndolo del disco si no está en caché
+    def cargar(self, ident):
+        if ident in self.cache:
+            self.cache.move_to_end(ident)
+            return self.cache[ident]
+        if not PATRON_ID.fullmatch(ident):
+            raise ValueError(f"Id de subárbol no válido: '{ident}'.")
+        ruta = os.path.join(self.directorio, ident + ".json")
+        with open(ruta, "rb") as archivo:
+            contenido = archivo.read()
+        arbol = json.loads(contenido)
+        huella = hashlib.sha256(contenido).hexdigest()
+        if huella not in self.validados:
+            validar_arbol(arbol, ruta)
+            self.validados.add(huella)
+            self._guardar_validados()
+        compilado = compilar_arbol(arbol)
+        self.cargas += 1
+        self.cache[ident] = compilado
+        self.ocupado += compilado.tamano_memoria()
+        # Expulsa los menos recientes, pero nunca el que se acaba de cargar
+        while self.ocupado > self.presupuesto and len(self.cache) > 1:
+            _, expulsado = self.cache.popitem(last=False)
+            self.ocupado -= expulsado.tamano_memoria()
+        return compilado
+
+    def _guardar_validados(self):
+        try:
+            with open(self._ruta_validados, "w", encoding="utf-8") as archivo:
+                json.dump(sorted(self.validados), archivo)
+        except OSError:
+            pass  # Sin permiso de escritura solo se pierde la caché de validación
+
+# Guarda un árbol anidado como base de conocimiento, partiéndolo en un archivo por
+# cada subárbol que empieza a una profundidad múltiplo de `profundidad`.
+# Devuelve la ruta del archivo raíz.
+def exportar_base(arbol, directorio, profundidad=8, id_raiz="raiz"):
+    os.makedirs(directorio, exist_ok=True)
+    pendientes = [(id_raiz, arbol)]
+    contador = 0
+    while pendientes:
+        ident, subarbol = pendientes.pop()
+        copia = {}
+        # Copia el subárbol hasta la profundidad de corte; lo que sigue va a otro archivo
+        pila = [(subarbol, copia, "raiz", 0)]
+        while pila:
+            nodo, contenedor, clave, nivel = pila.pop()
+            if isinstance(nodo, str) or es_referencia(nodo):
+                contenedor[clave] = nodo
+            elif nivel == profundidad:
+                contador += 1
+                hijo = f"{id_raiz}-{contador}"
+                contenedor[clave] = {"$ref": hijo}
+                pendientes.append((hijo, nodo))
+            else:
+                pregunta, opciones = next(iter(nodo.items()))
+                nuevas = {}
+                contenedor[clave] = {pregunta: nuevas}
+                for respuesta, hijo in opciones.items():
+                    nuevas[respuesta] = None
+                    pila.append((hijo, nuevas, respuesta, nivel + 1))
+        with open(os.path.join(directorio, ident + ".json"), "w", encoding="utf-8") as archivo:
+            json.dump(copia["raiz"], archivo, ensure_ascii=False)
+    return os.path.join(directorio, id_raiz + ".json")
+
+# Evalúa muchas sesiones registradas a la vez sobre el árbol compilado.
+# respuestas es una matriz sesiones x pasos de códigos de respuesta (relleno con -1).
+# Igual que DecisionTreeGUI.next_node, una respuesta sin destino deja la sesión en
+# su nodo actual, y las respuestas posteriores a un diagnóstico se ignoran.
+# Las referencias a subárboles externos no se siguen: la sesión termina en ellas.
+# Devuelve el nodo final de cada sesión y el conteo de sesiones por nodo.
+def evaluar_lote(compilado, respuestas):
+    if np is None:
+        return _evaluar_lote_python(compilado, respuestas)
+    # Se conserva el tipo entero del llamador (p. ej. int8): solo se convierte la columna de cada paso
+    respuestas = np.asarray(respuestas)
+    if respuestas.ndim != 2:
+        raise ValueError("Las respuestas deben ser una matriz de sesiones x pasos.")
+    if respuestas.size and not np.issubdtype(respuestas.dtype, np.integer):
+        raise TypeError("Las respuestas deben ser códigos enteros.")
+    ancho = len(compilado.respuestas)
+    tabla = np.frombuffer(compilado.siguiente, dtype=np.intc)
+    es_hoja = np.frombuffer(compilado.diagnostico, dtype=np.intc) >= 0
+    nodos = np.zeros(len(respuestas), dtype=np.intp)
+    activas = np.arange(len(respuestas))
+    # Avanza todas las sesiones un nivel por paso, descartando las que ya llegaron a una hoja
+    for paso in range(respuestas.shape[1]):
+        activas = activas[~es_hoja[nodos[activas]]]
+        if not len(activas):
+            break
+        actuales = nodos[activas]
+        codigos = respuestas[activas, paso].astype(np.intp)
+        validos = (codigos >= 0) & (codigos < ancho)
+        destino = tabla[actuales * ancho + np.where(validos, codigos, 0)]
+        nodos[activas] = np.where(validos & (destino >= 0), destino, actuales)
+    return nodos, np.bincount(nodos, minlength=compilado.num_nodos)
+
+def _evaluar_lote_python(compilado, respuestas):
+    nodos = []
+    conteos = [0] * compilado.num_nodos
+    for sesion in respuestas:
+        nodo = 0
+        for codigo in sesion:
+            if compilado.es_diagnostico(nodo):
+                break
+            destino = compilado.siguiente_nodo(nodo, codigo)
+            if destino is not None:
+                nodo = destino
+        nodos.append(nodo)
+        conteos[nodo] += 1
+    return nodos, conteos
+
+# Convierte los conteos por nodo en frecuencias por texto de diagnóstico
+def frecuencias_diagnostico(compilado, conteos):
+    frecuencias = {}
+    for nodo, cantidad in enumerate(conteos):
+        if cantidad and compilado.es_diagnostico(nodo):
+            texto = compilado.texto(nodo)
+            frecuencias[texto] = frecuencias.get(texto, 0) + int(cantidad)
+    return frecuencias
+
+# -------------------- ESTADÍSTICAS DE USO Y OPTIMIZACIÓN --------------------
+# Contadores de visitas por nodo y de respuestas elegidas en cada pregunta.
+# En el archivo se guardan por ruta de respuestas ("No > Sí"), que no cambia al
+# recompilar el mismo árbol, en lugar de por número de nodo.
+SEPARADOR_RUTA = " > "
+
+class EstadisticasArbol:
+    def __init__(self, compilado):
+        self.compilado = compilado
+        self.visitas = {}     # Nodo -> veces que se mostró
+        self.respuestas = {}  # (nodo, código) -> veces que se eligió la respuesta
+
+    def registrar_visita(self, nodo):
+        self.visitas[nodo] = self.visitas.get(nodo, 0) + 1
+
+    # Registra el paso de un nodo a otro (la respuesta se deduce del destino)
+    def registrar_respuesta(self, nodo, destino):
+        clave = (nodo, self.compilado.indices()[2][destino])
+        self.respuestas[clave] = self.respuestas.get(clave, 0) + 1
+        self.registrar_visita(destino)
+
+    def guardar(self, ruta):
+        compilado = self.compilado
+        visitas = {SEPARADOR_RUTA.join(compilado.ruta(nodo)): n for nodo, n in self.visitas.items()}
+        respuestas = {}
+        for (nodo, codigo), n in self.respuestas.items():
+            respuestas.setdefault(SEPARADOR_RUTA.join(compilado.ruta(nodo)), {})[compilado.respuestas[codigo]] = n
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump({"visitas": visitas, "respuestas": respuestas}, archivo, ensure_ascii=False, indent=1)
+
+    # Suma los contadores de un archivo; las rutas que ya no existen se ignoran
+    def cargar(self, ruta):
+        with open(ruta, encoding="utf-8") as archivo:
+            datos = json.load(archivo)
+        for clave, n in datos.get("visitas", {}).items():
+            nodo = self.compilado.nodo_de_ruta(clave.split(SEPARADOR_RUTA) if clave else [])
+            if nodo is not None:
+                self.visitas[nodo] = self.visitas.get(nodo, 0) + n
+        for clave, conteos in datos.get("respuestas", {}).items():
+            nodo = self.compilado.nodo_de_ruta(clave.split(SEPARADOR_RUTA) if clave else [])
+            for respuesta, n in conteos.items():
+                codigo = self.compilado.codigo(respuesta)
+                if nodo is not None and codigo is not None and self.compilado.siguiente_nodo(nodo, codigo) is not None:
+                    self.respuestas[(nodo, codigo)] = self.respuestas.get((nodo, codigo), 0) + n
+
+    # Probabilidad de cada respuesta en una pregunta, con suavizado de Laplace
+    # (una pregunta sin datos reparte la probabilidad por igual)
+    def probabilidades(self, nodo):
+        opciones = self.compilado.opciones(nodo)
+        conteos = [self.respuestas.get((nodo, codigo), 0) + 1 for codigo, _ in opciones]
+        total = sum(conteos)
+        return {codigo: n / total for (codigo, _), n in zip(opciones, conteos)}
+
+# Un "filtro" es una pregunta en la que exactamente una respuesta continúa hacia
+# otra pregunta y las demás terminan en un diagnóstico. Devuelve el código que continúa.
+def _continuacion_filtro(compilado, nodo):
+    opciones = compilado.opciones(nodo)
+    continuas = [codigo for codigo, _ in opciones
+                 if not compilado.es_diagnostico(compilado.siguiente_nodo(nodo, codigo))]
+    return continuas[0] if len(continuas) == 1 and len(opciones) > 1 else None
+
+# Cadena máxima de filtros consecutivos que empieza en un nodo y la pregunta en
+# la que termina. Las cadenas de menos de dos filtros no se pueden reordenar.
+def _cadena_filtros(compilado, nodo):
+    cadena = []
+    actual = nodo
+    continua = _continuacion_filtro(compilado, actual)
+    while continua is not None:
+        cadena.append((actual, continua))
+        actual = compilado.siguiente_nodo(actual, continua)
+        continua = _continuacion_filtro(compilado, actual)
+    return (cadena, actual) if len(cadena) > 1 else ([], nodo)
+
+# Probabilidad de salir del árbol en un filtro (no tomar la respuesta que continúa)
+def _prob_salida(estadisticas, filtro, continua):
+    return 1.0 - estadisticas.probabilidades(filtro)[continua]
+
+# Orden propuesto para una cadena de filtros. Solo se mueven los filtros cuya
+# pregunta está en `independientes`: cada tramo consecutivo de ellos se ordena de
+# mayor a menor probabilidad de salida y los demás filtros no cambian de posición.
+def _ordenar_cadena(compilado, estadisticas, cadena, independientes):
+    orden = list(cadena)
+    i = 0
+    while i < len(orden):
+        fin = i
+        while fin < len(orden) and compilado.texto(orden[fin][0]) in independientes:
+            fin += 1
+        if fin - i > 1:
+            orden[i:fin] = sorted(orden[i:fin], key=lambda par: _prob_salida(estadisticas, *par), reverse=True)
+        i = fin + 1
+    return orden
+
+# Número esperado de preguntas por sesión. Con `independientes` se calcula para el
+# árbol que propone optimizar_arbol con esas mismas preguntas declaradas independientes.
+def preguntas_esperadas(compilado, estadisticas, independientes=()):
+    # Postorden con pila explícita; cada unidad es una cadena de filtros o una pregunta
+    esperado = {}
+    pila = [(0, False)]
+    while pila:
+        nodo, listo = pila.pop()
+        if compilado.es_diagnostico(nodo) or compilado.es_referencia(nodo):
+            esperado[nodo] = 0.0  # Las preguntas de subárboles externos no se cuentan
+            continue
+        cadena, cola = _cadena_filtros(compilado, nodo)
+        if not listo:
+            pila.append((nodo, True))
+            pila.extend((compilado.siguiente_nodo(cola, codigo), False)
+                        for codigo, _ in compilado.opciones(cola))
+            continue
+        cola_esperada = 1.0 + sum(p * esperado[compilado.siguiente_nodo(cola, codigo)]
+                                  for codigo, p in estadisticas.probabilidades(cola).items())
+        if independientes:
+            cadena = _ordenar_cadena(compilado, estadisticas, cadena, independientes)
+        salidas = [_prob_salida(estadisticas, filtro, continua) for filtro, continua in cadena]
+        # Cada filtro se pregunta solo si los anteriores no terminaron la sesión
+        total, llega = 0.0, 1.0
+        for salida in salidas:
+            total += llega
+            llega *= 1.0 - salida
+        esperado[nodo] = total + llega * cola_esperada
+    return esperado[0]
+
+# Propone un árbol reordenado que minimiza las preguntas esperadas por sesión.
+# La forma del árbol no dice si dos preguntas son independientes, así que el
+# llamador declara en `independientes` los textos de las preguntas cuya respuesta
+# no depende de las demás de su cadena de filtros; sin ellas no se reordena nada.
+# Entre filtros consecutivos declarados se pregunta primero el de mayor probabilidad
+# de salida: cada uno conserva esa probabilidad y sus diagnósticos en cualquier
+# posición, y con costo 1 por pregunta ese orden es óptimo (intercambio de vecinos).
+# Devuelve (árbol anidado, esperado antes, esperado después, cadenas reordenadas).
+def optimizar_arbol(compilado, estadisticas, independientes=()):
+    independientes = set(independientes)
+    reordenadas = []
+    resultado = {}
+    # Cada entrada de la pila es (nodo, contenedor, clave): dónde va el subárbol
+    pila = [(0, resultado, "raiz")]
+    while pila:
+        nodo, contenedor, clave = pila.pop()
+        if compilado.es_diagnostico(nodo) or compilado.es_referencia(nodo):
+            contenedor[clave] = _hoja_anidada(compilado, nodo)
+            continue
+        cadena, cola = _cadena_filtros(compilado, nodo)
+        orden = _ordenar_cadena(compilado, estadisticas, cadena, independientes)
+        if orden != cadena:
+            reordenadas.append(([compilado.texto(n) for n, _ in cadena],
+                                [compilado.texto(n) for n, _ in orden]))
+        # Reconstruye la cadena en el nuevo orden y cuelga la cola de la última continuación
+        for filtro, continua in orden:
+            opciones = {}
+            contenedor[clave] = {compilado.texto(filtro): opciones}
+            for codigo, respuesta in compilado.opciones(filtro):
+                if codigo == continua:
+                    opciones[respuesta] = None
+                    contenedor, clave = opciones, respuesta
+                else:
+                    opciones[respuesta] = _hoja_anidada(compilado, compilado.siguiente_nodo(filtro, codigo))
+        if compilado.es_referencia(cola):
+            contenedor[clave] = _hoja_anidada(compilado, cola)
+            continue
+        opciones = {}
+        contenedor[clave] = {compilado.texto(cola): opciones}
+        for codigo, respuesta in compilado.opciones(cola):
+            opciones[respuesta] = None
+            pila.append((compilado.siguiente_nodo(cola, codigo), opciones, respuesta))
+    antes = preguntas_esperadas(compilado, estadisticas)
+    despues = preguntas_esperadas(compilado, estadisticas, independientes)
+    return resultado["raiz"], antes, despues, reordenadas
+
+def _hoja_anidada(compilado, nodo):
+    if compilado.es_referencia(nodo):
+        return {"$ref": compilado.texto(nodo)}
+    return compilado.texto(nodo)
+
+# Informe del optimizador para un árbol, un archivo de estadísticas opcional y las
+# preguntas que el llamador declara independientes
+def informe_optimizacion(arbol, ruta_estadisticas=None, independientes=()):
+    compilado = compilar_arbol(arbol)
+    estadisticas = EstadisticasArbol(compilado)
+    if ruta_estadisticas:
+        estadisticas.cargar(ruta_estadisticas)
+    optimizado, antes, despues, reordenadas = optimizar_arbol(compilado, estadisticas, independientes)
+    if not independientes:
+        print("No se declararon preguntas independientes: no se propone ningún reordenamiento.")
+    print(f"Preguntas esperadas por sesión: {antes:.3f} -> {despues:.3f} "
+          f"({(antes - despues) / antes:.1%} menos)" if antes else "El árbol no tiene preguntas.")
+    for original, nuevo in reordenadas:
+        print("Cadena reordenada:\n  " + "\n  ".join(original) + "\n=>\n  " + "\n  ".join(nuevo))
+    return optimizado
+
+# Genera un árbol anidado aleatorio de preguntas Sí/No con el número de nodos indicado
+def generar_arbol_sintetico(num_nodos=100_000, semilla=0):
+    aleatorio = random.Random(semilla)
+    raiz = {}
+    hojas = [(raiz, None)]  # (diccionario contenedor, clave) de las hojas sin asignar
+    total = 1
+    contador = 0
+    while total + 2 <= num_nodos:
+        # Convierte una hoja al azar en pregunta con dos respuestas
+        indice = aleatorio.randrange(len(hojas))
+        hojas[indice], hojas[-1] = hojas[-1], hojas[indice]
+        contenedor, clave = hojas.pop()
+        opciones = {"Sí": None, "No": None}
+        pregunta = {f"¿Pregunta {contador}?": opciones}
+        contador += 1
+        if clave is None:
+            raiz.update(pregunta)
+        else:
+            contenedor[clave] = pregunta
+        hojas.extend([(opciones, "Sí"), (opciones, "No")])
+        total += 2
+    for i, (contenedor, clave) in enumerate(hojas):
+        contenedor[clave] = f"Diagnóstico {i}"
+    return raiz
+
+# Compara recorrer el diccionario anidado con recorrer las tablas compiladas
+def benchmark_compilado(num_nodos=100_000, sesiones=20_000):
+    import tracemalloc
+    tracemalloc.start()
+    arbol = generar_arbol_sintetico(num_nodos)
+    memoria_dict, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    inicio = time.perf_counter()
+    compilado = compilar_arbol(arbol)
+    print(f"Compilación de {compilado.num_nodos} nodos: {time.perf_counter() - inicio:.2f} s")
+    tracemalloc.start()
+    compilado = compilar_arbol(arbol)
+    memoria_tablas, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Memoria: diccionarios {memoria_dict / 2**20:.1f} MiB, tablas e índices {memoria_tablas / 2**20:.1f} MiB")
+
+    aleatorio = random.Random(1)
+    respuestas = [[aleatorio.randrange(2) for _ in range(64)] for _ in range(sesiones)]
+    textos = ("Sí", "No")
+
+    inicio = time.perf_counter()
+    pasos = 0
+    for sesion in respuestas:
+        nodo = arbol
+        for codigo in sesion:
+            if isinstance(nodo, str):
+                break
+            pregunta = list(nodo.keys())[0]  # Igual que la interfaz original
+            nodo = nodo[pregunta][textos[codigo]]
+            pasos += 1
+    segundos_dict = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    ancho = len(compilado.respuestas)
+    siguiente, diagnostico = compilado.siguiente, compilado.diagnostico
+    codigos = [compilado.respuestas.index(t) for t in textos]
+    for sesion in respuestas:
+        nodo = 0
+        for codigo in sesion:
+            if diagnostico[nodo] >= 0:
+                break
+            nodo = siguiente[nodo * ancho + codigos[codigo]]
+    segundos_tablas = time.perf_counter() - inicio
+    print(f"{sesiones} sesiones ({pasos} pasos): diccionarios {segundos_dict:.3f} s, "
+          f"tablas {segundos_tablas:.3f} s ({segundos_dict / segundos_tablas:.1f}x)")
+
+    # Evaluación por lotes: mismo resultado que el intérprete, sesión por sesión
+    nodos, _ = evaluar_lote(compilado, respuestas[:1000])
+    for sesion, final in zip(respuestas[:1000], nodos):
+        interprete = InterpreteDecision(compilado)
+        for codigo in sesion:
+            if interprete.terminado():
+                break
+            interprete.responder(codigo)
+        assert interprete.nodo == final
+    if np is None:
+        print("NumPy no está instalado: se omite la evaluación vectorizada.")
+        return
+    lote = np.random.default_rng(2).integers(0, 2, size=(1_000_000, 64), dtype=np.int8)
+    inicio = time.perf_counter()
+    nodos, conteos = evaluar_lote(compilado, lote)
+    segundos = time.perf_counter() - inicio
+    print(f"Lote de {len(lote)} sesiones: {segundos:.3f} s ({len(lote) / segundos:,.0f} sesiones/s), "
+          f"{len(frecuencias_diagnostico(compilado, conteos))} diagnósticos distintos")
+
+# Recorre una base de conocimiento partida en archivos, con y sin caché suficiente
+def benchmark_base(num_nodos=100_000, sesiones=2_000):
+    arbol = generar_arbol_sintetico(num_nodos)
+    aleatorio = random.Random(4)
+    with tempfile.TemporaryDirectory() as directorio:
+        inicio = time.perf_counter()
+        ruta = exportar_base(arbol, directorio, profundidad=6)
+        print(f"Exportación en {len(os.listdir(directorio))} archivos: {time.perf_counter() - inicio:.2f} s")
+        del arbol
+        # La primera pasada valida cada archivo; las siguientes reutilizan los hashes guardados
+        pasadas = (("sin validar", 2**30), ("validada", 2**30), ("validada", 256 * 2**10))
+        for estado, presupuesto in pasadas:
+            base = BaseConocimiento(ruta, presupuesto)
+            inicio = time.perf_counter()
+            interprete = InterpreteDecision(base.raiz(), base)
+            arranque = time.perf_counter() - inicio
+            for _ in range(sesiones):
+                interprete.reiniciar()
+                while not interprete.terminado():
+                    interprete.responder(aleatorio.choice(interprete.opciones())[0])
+            print(f"Base {estado}, presupuesto {presupuesto / 2**20:.2f} MiB: arranque {arranque * 1000:.1f} ms, "
+                  f"{sesiones} sesiones en {time.perf_counter() - inicio:.2f} s, {base.cargas} archivos leídos, "
+                  f"{len(base.cache)} en caché ({base.ocupado / 2**10:.0f} KiB)")
+
 # -------------------- BLOQUE DE INTERFAZ --------------------
 class DecisionTreeGUI:
-    def __init__(self, root, tree):
+    def __init__(self, root, tree, ruta_estadisticas=None, base=None):
         self.root = root  # Ventana principal
-        self.tree = tree  # Árbol de decisiones
-        self.current_node = tree  # Nodo actual
+        self.tree = tree  # Árbol de decisiones (None si se usa una base de conocimiento)
+        self.base = base  # Base de conocimiento de la que se cargan los subárboles
+        # Intérprete que lleva la sesión; entra solo en los subárboles externos
+        self.interprete = InterpreteDecision(base.raiz() if tree is None else compilar_arbol(tree), base)
+
+        # Contadores de uso del árbol raíz; se guardan cada vez que una sesión llega a un diagnóstico
+        self.ruta_estadisticas = ruta_estadisticas
+        self.estadisticas = EstadisticasArbol(self.interprete.raiz)
+        if ruta_estadisticas and os.path.exists(ruta_estadisticas):
+            self.estadisticas.cargar(ruta_estadisticas)
+        self.estadisticas.registrar_visita(0)
 
         # Colores y estilos
         self.bg_color = "#e3f0fa"
@@ -117,55 +906,98 @@ class DecisionTreeGUI:
         )
 
         # Muestra la primera pregunta
-        self.show_question(self.current_node)
+        self.show_question()
 
-    def show_question(self, node):
+    def show_question(self):
         # Elimina los botones anteriores
         for widget in self.button_frame.winfo_children():
             widget.destroy()
         self.restart_btn.pack_forget()
 
-        # Si el nodo es un string, es un diagnóstico final
-        if isinstance(node, str):
+        # Si el nodo es una hoja, es un diagnóstico final
+        if self.interprete.terminado():
             self.question_label.config(
-                text="Diagnóstico:\n" + node,
+                text="Diagnóstico:\n" + self.interprete.texto(),
                 fg=self.diagnosis_color, font=("Segoe UI", 14, "bold")
             )
             self.restart_btn.pack(pady=10)
             return
 
-        # Si el nodo es un diccionario, muestra la pregunta y los botones
-        question = list(node.keys())[0]
+        # Si el nodo es una pregunta, muestra la pregunta y los botones
         self.question_label.config(
-            text=question, fg="#222", font=self.font
+            text=self.interprete.texto(), fg="#222", font=self.font
         )
-        for answer in node[question]:
+        for codigo, answer in self.interprete.opciones():
             btn = tk.Button(
                 self.button_frame, text=answer, width=15,
-                command=lambda ans=answer: self.next_node(node[question][ans]),
+                command=lambda c=codigo: self.next_node(c),
                 bg=self.button_color, fg=self.button_fg, font=("Segoe UI", 11, "bold"),
                 relief="raised", bd=2, cursor="hand2", activebackground="#1565c0"
             )
             btn.pack(side=tk.LEFT, padx=15, pady=5)
 
-    def next_node(self, next_node):
-        # Cambia al siguiente nodo según la respuesta
-        if next_node is None:
-            messagebox.showerror("Error", "Respuesta no válida.")
+    def next_node(self, codigo):
+        # Avanza según la respuesta; si falla, la sesión sigue en la misma pregunta
+        interprete = self.interprete
+        compilado, nodo = interprete.compilado, interprete.nodo
+        try:
+            interprete.responder(codigo)
+        except (OSError, ValueError) as error:
+            messagebox.showerror("Error", f"No se pudo continuar:\n{error}")
             return
-        self.current_node = next_node
-        self.show_question(self.current_node)
+        if compilado is interprete.raiz:
+            self.estadisticas.registrar_respuesta(nodo, compilado.siguiente_nodo(nodo, codigo))
+        if self.ruta_estadisticas and interprete.terminado():
+            self.estadisticas.guardar(self.ruta_estadisticas)
+        self.show_question()
 
     def restart(self):
         # Reinicia el árbol de decisiones
-        self.current_node = self.tree
-        self.show_question(self.current_node)
+        try:
+            self.interprete.reiniciar()
+        except (OSError, ValueError) as error:
+            messagebox.showerror("Error", f"No se pudo cargar el subárbol:\n{error}")
+            return
+        self.estadisticas.registrar_visita(0)
+        self.show_question()
 
 # -------------------- EJECUCIÓN PRINCIPAL --------------------
-if __name__ == "__main__":
+ARCHIVO_ESTADISTICAS = "estadisticas_arbol.json"
+
+if __name__ == "__main__" and "--benchmark" in sys.argv[1:]:
+    benchmark_compilado()
+    benchmark_base()
+elif __name__ == "__main__" and "--exportar" in sys.argv[1:]:
+    # Uso: python Ejercicio3.py --exportar directorio [profundidad]
+    argumentos = [a for a in sys.argv[1:] if a != "--exportar"]
+    profundidad = int(argumentos[1]) if len(argumentos) > 1 else 8
+    print(exportar_base(decision_tree, argumentos[0] if argumentos else "base_diagnostico", profundidad))
+elif __name__ == "__main__" and "--optimizar" in sys.argv[1:]:
+    # Uso: python Ejercicio3.py --optimizar [estadisticas.json] [--independientes preguntas.txt]
+    # preguntas.txt tiene una pregunta por línea, con el mismo texto que en el árbol
+    argumentos = [a for a in sys.argv[1:] if a != "--optimizar"]
+    independientes = []
+    if "--independientes" in argumentos:
+        i = argumentos.index("--independientes")
+        with open(argumentos[i + 1], encoding="utf-8") as archivo:
+            independientes = [linea.strip() for linea in archivo if linea.strip()]
+        del argumentos[i:i + 2]
+    ruta = argumentos[0] if argumentos else ARCHIVO_ESTADISTICAS
+    informe_optimizacion(decision_tree, ruta if os.path.exists(ruta) else None, independientes)
+elif __name__ == "__main__" and sys.argv[1:]:
+    # Uso: python Ejercicio3.py base.json  (abre una base de conocimiento en JSON)
+    ruta = sys.argv[1]
+    root = tk.Tk()
+    root.title("Árbol de Decisiones - " + os.path.basename(ruta))
+    root.geometry("520x340")
+    root.resizable(False, False)
+    app = DecisionTreeGUI(root, None, os.path.splitext(ruta)[0] + ".estadisticas.json",
+                          base=BaseConocimiento(ruta))
+    root.mainloop()
+elif __name__ == "__main__":
     root = tk.Tk()
     root.title("Árbol de Decisiones - Diagnóstico de Dispositivo")
     root.geometry("520x340")
     root.resizable(False, False)
-    app = DecisionTreeGUI(root, decision_tree)
+    app = DecisionTreeGUI(root, decision_tree, ARCHIVO_ESTADISTICAS)
     root.mainloop()
\ No newline at end of file
@@ -1,42 +1,614 @@
+import csv
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
 import tkinter as tk
-from tkinter import messagebox, ttk
+from itertools import islice
+from tkinter import filedialog, messagebox, ttk
 
 # Clase Persona representa un nodo en el árbol genealógico
 class Persona:
+    # Siguiente valor de orden topológico para personas nuevas
+    _siguiente_orden = 0
+    # Cuántas personas tienen niveles de ancestros en caché
+    _con_cache = 0
+    # Época de la estructura: aumenta con cada cambio de padres. Un número de
+    # descendientes en caché solo vale si se calculó en la época actual, porque un
+    # cambio afecta a todos los ancestros y recorrerlos en cada alta costaría O(n).
+    _epoca = 0
+
     def __init__(self, nombre, padre=None, madre=None):
         # Nombre de la persona (string)
         self.nombre = nombre
+        # Posición en un orden topológico: todo progenitor tiene un orden menor que sus hijos.
+        # Una persona nueva no tiene hijos, así que puede ir al final.
+        self.orden = Persona._siguiente_orden
+        Persona._siguiente_orden += 1
         # Padre y madre son objetos Persona o None
+        self.padre = None
+        self.madre = None
+        # Hijos en orden de registro (índice hacia abajo que mantiene asignar_padres)
+        self.hijos = []
+        # Caché de ancestros por generación: tupla por nivel, sin repetidos
+        self._niveles = None
+        # Caché del número de descendientes distintos: (época, número)
+        self._num_descendientes = None
+        if padre is not None or madre is not None:
+            self.asignar_padres(padre, madre)
+
+    def asignar_padres(self, padre, madre):
+        # Cambia los padres manteniendo actualizada la lista de hijos de cada uno.
+        # Lanza ValueError si un progenitor nuevo es la persona o un descendiente suyo.
+        if padre is not None and padre is madre:
+            raise ValueError("Padre y madre no pueden ser la misma persona.")
+        for nuevo in (padre, madre):
+            if nuevo is not None and nuevo is not self.padre and nuevo is not self.madre:
+                _ordenar_antes(nuevo, self)
+        if self._enlazar(padre, madre):
+            self._invalidar_niveles()
+            Persona._epoca += 1
+
+    def _enlazar(self, padre, madre):
+        # Cambia los enlaces en ambos sentidos sin verificar ciclos ni limpiar cachés
+        # (las importaciones masivas lo hacen una sola vez al final). Retorna si hubo cambio.
+        for anterior in (self.padre, self.madre):
+            if anterior is not None and anterior is not padre and anterior is not madre:
+                anterior.hijos.remove(self)
+        for nuevo in (padre, madre):
+            if nuevo is not None and nuevo is not self.padre and nuevo is not self.madre:
+                nuevo.hijos.append(self)
+        cambio = self.padre is not padre or self.madre is not madre
         self.padre = padre
         self.madre = madre
+        return cambio
+
+    def _invalidar_niveles(self):
+        # Los ancestros cambian para la persona y todos sus descendientes; el
+        # recorrido se corta en cuanto no queda ninguna caché por limpiar
+        pendientes = [self]
+        vistos = {id(self)}
+        while pendientes and Persona._con_cache:
+            persona = pendientes.pop()
+            if persona._niveles is not None:
+                persona._niveles = None
+                Persona._con_cache -= 1
+            for hijo in persona.hijos:
+                if id(hijo) not in vistos:
+                    vistos.add(id(hijo))
+                    pendientes.append(hijo)
+
+    def num_descendientes(self):
+        # Descendientes distintos en todas las generaciones, memoizado hasta el próximo cambio
+        if self._num_descendientes is None or self._num_descendientes[0] != Persona._epoca:
+            vistos = set()
+            pendientes = [self]
+            while pendientes:
+                for hijo in pendientes.pop().hijos:
+                    if hijo not in vistos:
+                        vistos.add(hijo)
+                        pendientes.append(hijo)
+            self._num_descendientes = (Persona._epoca, len(vistos))
+        return self._num_descendientes[1]
+
+    def niveles_ancestros(self, generacion):
+        # Lista de niveles (padres, abuelos, ...) hasta `generacion`, calculada en anchura.
+        # Cada nivel no repite personas aunque se llegue a ellas por varias líneas,
+        # así que su tamaño está acotado por el número de ancestros distintos.
+        niveles = self._niveles
+        if niveles is None:
+            niveles = self._niveles = []
+            Persona._con_cache += 1
+        while len(niveles) < generacion:
+            anterior = niveles[-1] if niveles else (self,)
+            if not anterior:
+                break  # No hay más generaciones conocidas
+            siguiente = dict.fromkeys(p for persona in anterior
+                                      for p in (persona.padre, persona.madre) if p is not None)
+            niveles.append(tuple(siguiente))
+        return niveles
+
+    def hermanos(self):
+        # Hermanos con el mismo padre y la misma madre, recorriendo solo los hijos de un progenitor
+        progenitor = self.padre or self.madre
+        if progenitor is None:
+            return []
+        return [p for p in progenitor.hijos
+                if p is not self and p.padre is self.padre and p.madre is self.madre]
 
     def __str__(self):
         return self.nombre
 
+# Prepara la arista progenitor -> hijo manteniendo el orden topológico incremental
+# (algoritmo de Pearce y Kelly). Si el progenitor ya va antes no hay nada que hacer;
+# si no, solo se recorren los descendientes del hijo y los ancestros del progenitor
+# cuyo orden cae entre ambos, y se reparten esos mismos valores de orden.
+def _ordenar_antes(progenitor, hijo):
+    if progenitor is hijo:
+        raise ValueError(f"'{hijo.nombre}' no puede ser su propio progenitor.")
+    if progenitor.orden < hijo.orden:
+        return
+    # Descendientes del hijo que hoy van antes del progenitor; si entre ellos
+    # aparece el progenitor, la arista cerraría un ciclo
+    adelante = []
+    vistos = {id(hijo)}
+    pila = [hijo]
+    while pila:
+        persona = pila.pop()
+        adelante.append(persona)
+        for descendiente in persona.hijos:
+            if descendiente is progenitor:
+                raise ValueError(f"'{progenitor.nombre}' no puede ser progenitor de "
+                                 f"'{hijo.nombre}' porque es su descendiente.")
+            if descendiente.orden < progenitor.orden and id(descendiente) not in vistos:
+                vistos.add(id(descendiente))
+                pila.append(descendiente)
+    # Ancestros del progenitor que hoy van después del hijo
+    atras = []
+    vistos = {id(progenitor)}
+    pila = [progenitor]
+    while pila:
+        persona = pila.pop()
+        atras.append(persona)
+        for ancestro in (persona.padre, persona.madre):
+            if ancestro is not None and ancestro.orden > hijo.orden and id(ancestro) not in vistos:
+                vistos.add(id(ancestro))
+                pila.append(ancestro)
+    # Los ancestros del progenitor pasan a ir antes que los descendientes del hijo
+    atras.sort(key=lambda p: p.orden)
+    adelante.sort(key=lambda p: p.orden)
+    afectados = atras + adelante
+    for persona, orden in zip(afectados, sorted(p.orden for p in afectados)):
+        persona.orden = orden
+
+# Recalcula el orden topológico de todas las personas tras una carga masiva
+# (algoritmo de Kahn); se asume que todo progenitor también está en `personas`.
+# Si hay ciclos, se corta solo un enlace por ciclo: se devuelven los enlaces
+# eliminados como parejas (hijo, progenitor).
+def _reconstruir_orden(personas):
+    faltan = {}  # Persona -> progenitores aún sin ordenar
+    listos = []
+    for persona in personas.values():
+        n = (persona.padre is not None) + (persona.madre is not None)
+        if n:
+            faltan[persona] = n
+        else:
+            listos.append(persona)
+    orden = Persona._siguiente_orden
+    i = 0
+    while i < len(listos):
+        persona = listos[i]
+        i += 1
+        persona.orden = orden
+        orden += 1
+        for hijo in persona.hijos:
+            if hijo in faltan:
+                faltan[hijo] -= 1
+                if not faltan[hijo]:
+                    del faltan[hijo]
+                    listos.append(hijo)
+    # Lo que queda forma ciclos o desciende de uno. Un recorrido en profundidad entre
+    # ellos corta solo los enlaces hacia alguien que sigue en la pila (los que cierran
+    # un ciclo); el resto se conserva y el postorden invertido da su orden topológico.
+    cortados = []
+    estado = {}      # Persona -> 1 mientras está en la pila, 2 al terminar
+    terminados = []  # Postorden: cada persona después de todos sus descendientes
+    for inicio in faltan:
+        if inicio in estado:
+            continue
+        estado[inicio] = 1
+        pila = [(inicio, iter(list(inicio.hijos)))]
+        while pila:
+            persona, hijos = pila[-1]
+            for hijo in hijos:
+                if hijo not in faltan:
+                    continue
+                if estado.get(hijo) == 1:
+                    if hijo.padre is persona:
+                        hijo._enlazar(None, hijo.madre)
+                    else:
+                        hijo._enlazar(hijo.padre, None)
+                    cortados.append((hijo.nombre, persona.nombre))
+                elif hijo not in estado:
+                    estado[hijo] = 1
+                    pila.append((hijo, iter(list(hijo.hijos))))
+                    break
+            else:
+                pila.pop()
+                estado[persona] = 2
+                terminados.append(persona)
+    for persona in reversed(terminados):
+        persona.orden = orden
+        orden += 1
+    Persona._siguiente_orden = orden
+    return cortados
+
+# Invalida todas las cachés tras modificar muchos enlaces a la vez
+def _invalidar_todo(personas):
+    for persona in personas.values():
+        if persona._niveles is not None:
+            persona._niveles = None
+            Persona._con_cache -= 1
+    Persona._epoca += 1
+
 # Función para encontrar ancestros en una generación específica
 def encontrar_ancestros(persona, generacion):
     """
     Retorna una lista de nombres de ancestros en la generación indicada.
     generacion=1: padres, generacion=2: abuelos, generacion=3: bisabuelos, etc.
+    Un ancestro que aparece por varias líneas (colapso de pedigrí) se lista una sola vez.
     """
     if persona is None or generacion < 1:
         return []
-    if generacion == 1:
-        # Retorna los padres si existen
-        return [p.nombre for p in [persona.padre, persona.madre] if p]
-    # Recursivamente busca en la generación anterior
-    ancestros = []
-    for p in [persona.padre, persona.madre]:
-        if p:
-            ancestros.extend(encontrar_ancestros(p, generacion - 1))  #-1 es # para ir hacia arriba en el árbol
-    return ancestros # extend sirve para añadir los elementos de una lista a otra
+    niveles = persona.niveles_ancestros(generacion)
+    if len(niveles) < generacion:
+        return []
+    return [p.nombre for p in niveles[generacion - 1]]
+
+# Función para encontrar descendientes en una generación específica
+def encontrar_descendientes(persona, generacion):
+    """
+    Genera los nombres de los descendientes en la generación indicada, sin repetidos.
+    generacion=1: hijos, generacion=2: nietos, generacion=3: bisnietos, etc.
+    Los nombres de la generación pedida se producen a medida que se encuentran.
+    """
+    if persona is None or generacion < 1:
+        return
+    # Baja nivel por nivel hasta la generación anterior a la pedida
+    nivel = [persona]
+    for _ in range(generacion - 1):
+        nivel = list(dict.fromkeys(hijo for p in nivel for hijo in p.hijos))
+        if not nivel:
+            return
+    vistos = set()
+    for p in nivel:
+        for hijo in p.hijos:
+            if hijo not in vistos:
+                vistos.add(hijo)
+                yield hijo.nombre
+
+# -------------------- IMPORTACIÓN Y EXPORTACIÓN --------------------
+# Los importadores leen el archivo en una sola pasada. Una referencia a alguien que
+# aparece más adelante queda como arreglo pendiente y se aplica en cuanto llega; la
+# memoria temporal es solo la de esas referencias adelantadas. Los enlaces se crean
+# sin verificar ciclos y al final se reconstruye el orden topológico una única vez.
+def _cargar_en_bloque(personas, leer):
+    reporte = {"cargados": 0, "actualizados": 0, "huerfanos": [], "ciclos": [], "errores": []}
+    # El recolector cíclico recorrería millones de personas vivas sin liberar nada
+    gc_activo = gc.isenabled()
+    gc.disable()
+    try:
+        leer(reporte)
+        reporte["ciclos"] = _reconstruir_orden(personas)
+        _invalidar_todo(personas)
+    finally:
+        if gc_activo:
+            gc.enable()
+    return reporte
+
+def importar_csv(ruta, personas):
+    """
+    Carga un CSV con columnas nombre,padre,madre (padre y madre pueden ir vacíos)
+    en el diccionario `personas`. Si la persona ya existe se actualizan sus padres.
+    Un progenitor que nunca aparece como fila se crea sin padres y se informa en
+    "huerfanos". Retorna un reporte con cargados, actualizados, huerfanos, ciclos
+    (enlaces (hijo, progenitor) eliminados por formar ciclos) y errores.
+    """
+    def leer(reporte):
+        pendientes = {}  # Nombre aún no visto -> [(hijo, "padre" o "madre")]
+        with open(ruta, newline="", encoding="utf-8") as archivo:
+            for numero, fila in enumerate(csv.reader(archivo), start=1):
+                if numero == 1 and [c.strip().lower() for c in fila] == ["nombre", "padre", "madre"]:
+                    continue  # Encabezado
+                if not fila or not fila[0].strip():
+                    if fila:
+                        reporte["errores"].append((numero, "El nombre no puede estar vacío."))
+                    continue
+                if len(fila) > 3:
+                    reporte["errores"].append((numero, "Se esperaban como máximo 3 columnas."))
+                    continue
+                nombre, padre, madre = (fila + ["", ""])[:3]
+                nombre, padre, madre = nombre.strip(), padre.strip(), madre.strip()
+                if padre and padre == madre:
+                    reporte["errores"].append((numero, "Padre y madre no pueden ser la misma persona."))
+                    continue
+                persona = personas.get(nombre)
+                if persona is None:
+                    persona = personas[nombre] = Persona(nombre)
+                    reporte["cargados"] += 1
+                    # Aplica los arreglos de quienes esperaban a esta persona
+                    for hijo, rol in pendientes.pop(nombre, ()):
+                        if rol == "padre":
+                            hijo._enlazar(persona, hijo.madre)
+                        else:
+                            hijo._enlazar(hijo.padre, persona)
+                else:
+                    reporte["actualizados"] += 1
+                persona._enlazar(personas.get(padre), personas.get(madre))
+                for rol, progenitor in (("padre", padre), ("madre", madre)):
+                    if progenitor and progenitor not in personas:
+                        pendientes.setdefault(progenitor, []).append((persona, rol))
+        # Progenitores mencionados que nunca tuvieron fila propia
+        for nombre, esperando in pendientes.items():
+            progenitor = personas[nombre] = Persona(nombre)
+            reporte["huerfanos"].append(nombre)
+            for hijo, rol in esperando:
+                if rol == "padre":
+                    hijo._enlazar(progenitor, hijo.madre)
+                else:
+                    hijo._enlazar(hijo.padre, progenitor)
+
+    return _cargar_en_bloque(personas, leer)
+
+def _registros_gedcom(archivo):
+    # Agrupa las líneas "nivel [@ref@] ETIQUETA [valor]" en registros de nivel 0
+    # Solo interesan los niveles 0 y 1; las subetiquetas (nivel 2 o más) se ignoran
+    registro = None
+    for numero, linea in enumerate(archivo, start=1):
+        nivel, _, resto = linea.strip().partition(" ")
+        if nivel == "0":
+            if registro is not None:
+                yield registro
+            ref, _, etiqueta = resto.partition(" ")
+            if ref.startswith("@") and etiqueta:
+                registro = (numero, ref, etiqueta.strip(), [])
+            else:
+                registro = (numero, None, ref, [])
+        elif nivel == "1" and registro is not None:
+            clave, _, valor = resto.partition(" ")
+            registro[3].append((clave, valor.strip()))
+    if registro is not None:
+        yield registro
+
+def importar_gedcom(ruta, personas):
+    """
+    Carga los registros INDI (nombre) y FAM (HUSB, WIFE, CHIL) de un archivo GEDCOM
+    en el diccionario `personas`. HUSB se toma como padre y WIFE como madre. Un
+    nombre repetido se distingue agregando su referencia, p. ej. "Juan Pérez (@I7@)",
+    y un contador si también está ocupado: "Juan Pérez (@I7@, 2)".
+    Las referencias a individuos inexistentes se informan en "huerfanos".
+    """
+    def leer(reporte):
+        por_ref = {}     # Referencia GEDCOM -> Persona
+        pendientes = {}  # Referencia aún no vista -> [(hijo_ref, padre_ref, madre_ref)]
+
+        def vincular(hijo_ref, padre_ref, madre_ref):
+            # Enlaza una familia o la deja esperando la primera referencia que falte
+            for ref in (hijo_ref, padre_ref, madre_ref):
+                if ref and ref not in por_ref:
+                    pendientes.setdefault(ref, []).append((hijo_ref, padre_ref, madre_ref))
+                    return
+            hijo = por_ref[hijo_ref]
+            hijo._enlazar(por_ref.get(padre_ref), por_ref.get(madre_ref))
+
+        with open(ruta, encoding="utf-8-sig", errors="replace") as archivo:
+            for numero, ref, etiqueta, campos in _registros_gedcom(archivo):
+                if etiqueta == "INDI" and ref:
+                    nombre = next((valor for clave, valor in campos if clave == "NAME"), "")
+                    nombre = " ".join(nombre.replace("/", " ").split()) or ref
+                    if nombre in personas:
+                        # Se agrega la referencia y, si aún choca (p. ej. al reimportar), un contador
+                        base, n = nombre, 2
+                        nombre = f"{base} ({ref})"
+                        while nombre in personas:
+                            nombre = f"{base} ({ref}, {n})"
+                            n += 1
+                    por_ref[ref] = personas[nombre] = Persona(nombre)
+                    reporte["cargados"] += 1
+                    for familia in pendientes.pop(ref, ()):
+                        vincular(*familia)
+                elif etiqueta == "FAM":
+                    padre_ref = next((valor for clave, valor in campos if clave == "HUSB"), None)
+                    madre_ref = next((valor for clave, valor in campos if clave == "WIFE"), None)
+                    if padre_ref is not None and padre_ref == madre_ref:
+                        reporte["errores"].append((numero, "Padre y madre no pueden ser la misma persona."))
+                        continue
+                    for clave, valor in campos:
+                        if clave == "CHIL":
+                            vincular(valor, padre_ref, madre_ref)
+        # Familias que nombran individuos inexistentes: se enlaza lo que sí existe
+        for ref, familias in pendientes.items():
+            reporte["huerfanos"].append(ref)
+            for hijo_ref, padre_ref, madre_ref in familias:
+                if hijo_ref in por_ref:
+                    por_ref[hijo_ref]._enlazar(por_ref.get(padre_ref), por_ref.get(madre_ref))
+
+    return _cargar_en_bloque(personas, leer)
+
+# Las personas en orden topológico, de modo que cada progenitor se escribe antes que sus hijos
+def _en_orden(personas):
+    return sorted(personas.values(), key=lambda p: p.orden)
+
+def exportar_csv(personas, ruta):
+    # Escribe nombre,padre,madre; al reimportarlo no hace falta ningún arreglo pendiente
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(["nombre", "padre", "madre"])
+        for persona in _en_orden(personas):
+            escritor.writerow([persona.nombre,
+                               persona.padre.nombre if persona.padre else "",
+                               persona.madre.nombre if persona.madre else ""])
+
+def exportar_gedcom(personas, ruta):
+    # Escribe un INDI por persona y un FAM por cada pareja de padres distinta.
+    # Las familias se forman recorriendo los hijos de cada progenitor, así que
+    # solo se guardan en memoria las referencias de las personas.
+    orden = _en_orden(personas)
+    refs = {persona: f"@I{i}@" for i, persona in enumerate(orden, start=1)}
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        archivo.write("0 HEAD\n1 GEDC\n2 VERS 5.5.1\n2 FORM LINEAGE-LINKED\n1 CHAR UTF-8\n")
+        for persona in orden:
+            archivo.write(f"0 {refs[persona]} INDI\n1 NAME {persona.nombre}\n")
+        familias = 0
+        for persona in orden:
+            # Familias en las que la persona figura como padre, o como madre sin padre
+            grupos = {}
+            for hijo in persona.hijos:
+                if hijo.padre is persona:
+                    grupos.setdefault(hijo.madre, []).append(hijo)
+                elif hijo.padre is None:
+                    grupos.setdefault(None, []).append(hijo)
+            for pareja, hijos in grupos.items():
+                familias += 1
+                archivo.write(f"0 @F{familias}@ FAM\n")
+                padre, madre = (persona, pareja) if hijos[0].padre is persona else (None, persona)
+                if padre is not None:
+                    archivo.write(f"1 HUSB {refs[padre]}\n")
+                if madre is not None:
+                    archivo.write(f"1 WIFE {refs[madre]}\n")
+                for hijo in hijos:
+                    archivo.write(f"1 CHIL {refs[hijo]}\n")
+        archivo.write("0 TRLR\n")
+
+# -------------------- CÁLCULO DE PARENTESCO --------------------
+ORDINALES = ["", "hermano", "segundo", "tercero", "cuarto", "quinto",
+             "sexto", "séptimo", "octavo", "noveno", "décimo"]
+ASCENDIENTES = ["", "padre", "abuelo", "bisabuelo", "tatarabuelo", "trastatarabuelo"]
+DESCENDIENTES = ["", "hijo", "nieto", "bisnieto", "tataranieto", "trastataranieto"]
+
+def _hijos_de_linea(persona, generacion, comunes):
+    # Ancestros de `persona` a `generacion` - 1 niveles que son hijos de algún ancestro común
+    nivel = (persona,) if generacion == 1 else persona.niveles_ancestros(generacion - 1)[generacion - 2]
+    return [p for p in nivel if p.padre in comunes or p.madre in comunes]
+
+def _es_medio(a, b, i, j, comunes):
+    # Medio parentesco: las dos líneas bajan de hijos que comparten un solo progenitor.
+    # Solo se afirma si esos hijos tienen padre y madre conocidos; con un progenitor
+    # desconocido se los trata como hermanos completos, igual que Persona.hermanos()
+    if len(comunes) != 1:
+        return False
+    return all(p.padre is not None and p.madre is not None
+               for p in _hijos_de_linea(a, i, comunes) + _hijos_de_linea(b, j, comunes))
+
+def _nombre_parentesco(a, b, i, j, comunes):
+    # Nombra qué es `a` para `b` cuando el ancestro común está a i generaciones de
+    # `a` y a j generaciones de `b`. Se antepone "medio" según _es_medio.
+    medio = "medio " if i and j and _es_medio(a, b, i, j, comunes) else ""
+    if i == 0:
+        if j == 1:
+            return "padre" if b.padre is a else "madre"
+        return ASCENDIENTES[j] if j < len(ASCENDIENTES) else f"ancestro en la generación {j}"
+    if j == 0:
+        return DESCENDIENTES[i] if i < len(DESCENDIENTES) else f"descendiente en la generación {i}"
+    if i == 1 and j == 1:
+        return medio + "hermano"
+    if i == 1:
+        return medio + ("tío" if j == 2 else "tío " + (ASCENDIENTES[j - 1] if j - 1 < len(ASCENDIENTES)
+                                                       else f"en la generación {j - 1}"))
+    if j == 1:
+        return medio + ("sobrino" if i == 2 else "sobrino " + (DESCENDIENTES[i - 1] if i - 1 < len(DESCENDIENTES)
+                                                               else f"en la generación {i - 1}"))
+    grado = min(i, j) - 1
+    termino = medio + "primo " + (ORDINALES[grado] if grado < len(ORDINALES) else f"de grado {grado}")
+    removido = abs(i - j)
+    if removido:
+        termino += f" {removido} {'vez' if removido == 1 else 'veces'} removido"
+    return termino
+
+def calcular_parentesco(a, b):
+    """
+    Retorna qué es `a` para `b` como diccionario con el término ("primo segundo
+    1 vez removido", "medio hermano", ...), los nombres de los ancestros comunes
+    más cercanos y las generaciones (i, j) que los separan de `a` y de `b`.
+    El ancestro común más cercano es el que minimiza max(i, j) y luego i + j.
+    Retorna None si no tienen ancestros comunes.
+    """
+    if a is b:
+        return {"termino": "misma persona", "ancestros_comunes": [a.nombre], "generaciones": (0, 0)}
+    # Búsqueda bidireccional sobre los niveles de ancestros memoizados: se avanza
+    # un nivel por vez del lado menos expandido. Cuando ambos lados llegaron al nivel
+    # m del mejor ancestro común encontrado, ya se vieron todos los pares con
+    # max(i, j) <= m y ningún nivel nuevo puede dar uno más cercano.
+    lados = (a, b)
+    distancias = ({a: 0}, {b: 0})
+    expandidos = [0, 0]
+    agotados = [False, False]
+    encontrados = []  # (i, j, ancestro común)
+    mejor = None      # (max(i, j), i + j) del más cercano hasta ahora
+    while not all(agotados):
+        lado = min((l for l in (0, 1) if not agotados[l]), key=lambda l: expandidos[l])
+        nivel = expandidos[lado] + 1
+        if mejor is not None and nivel > mejor[0]:
+            break
+        niveles = lados[lado].niveles_ancestros(nivel)
+        if len(niveles) < nivel or not niveles[nivel - 1]:
+            agotados[lado] = True
+            continue
+        expandidos[lado] = nivel
+        propias, otras = distancias[lado], distancias[1 - lado]
+        for persona in niveles[nivel - 1]:
+            if persona in propias:
+                continue
+            propias[persona] = nivel
+            if persona in otras:
+                i, j = (nivel, otras[persona]) if lado == 0 else (otras[persona], nivel)
+                encontrados.append((i, j, persona))
+                if mejor is None or (max(i, j), i + j) < mejor:
+                    mejor = (max(i, j), i + j)
+    if not encontrados:
+        return None
+    i, j, _ = min(encontrados, key=lambda e: (max(e[0], e[1]), e[0] + e[1]))
+    comunes = [persona for pi, pj, persona in encontrados if (pi, pj) == (i, j)]
+    return {"termino": _nombre_parentesco(a, b, i, j, comunes),
+            "ancestros_comunes": [persona.nombre for persona in comunes],
+            "generaciones": (i, j)}
+
+# Genera una población endogámica: cada generación tiene pocas personas y sus
+# padres se eligen entre la generación anterior, como en una familia real europea
+def generar_poblacion_endogamica(generaciones=40, por_generacion=12, semilla=0):
+    aleatorio = random.Random(semilla)
+    anterior = [Persona(f"G0-{i}") for i in range(por_generacion)]
+    personas = list(anterior)
+    for g in range(1, generaciones):
+        actual = []
+        for i in range(por_generacion):
+            padre, madre = aleatorio.sample(anterior, 2)
+            actual.append(Persona(f"G{g}-{i}", padre, madre))
+        personas.extend(actual)
+        anterior = actual
+    return personas
+
+# Compara la búsqueda recursiva original con los niveles memoizados
+def benchmark_ancestros(generacion=20):
+    personas = generar_poblacion_endogamica()
+    persona = personas[-1]
+
+    def recursivo(persona, generacion):
+        if persona is None or generacion < 1:
+            return []
+        if generacion == 1:
+            return [p.nombre for p in [persona.padre, persona.madre] if p]
+        ancestros = []
+        for p in [persona.padre, persona.madre]:
+            if p:
+                ancestros.extend(recursivo(p, generacion - 1))
+        return ancestros
+
+    inicio = time.perf_counter()
+    lista = recursivo(persona, generacion)
+    segundos_recursivo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    nombres = encontrar_ancestros(persona, generacion)
+    segundos_niveles = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    encontrar_ancestros(persona, generacion)
+    segundos_cache = time.perf_counter() - inicio
+    assert set(lista) == set(nombres)
+    print(f"Generación {generacion}: recursivo {len(lista)} nombres en {segundos_recursivo * 1000:.1f} ms, "
+          f"niveles {len(nombres)} distintos en {segundos_niveles * 1000:.2f} ms, "
+          f"con caché {segundos_cache * 1000:.3f} ms")
+
+# Máximo de nombres que se insertan en la lista de resultados
+MAX_RESULTADOS = 500
 
 # Clase principal para la interfaz gráfica
 class ArbolGenealogicoApp(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Árbol Genealógico - Presentación Final")
-        self.geometry("600x650")  # Antes: 600x500
+        self.geometry("600x850")  # Antes: 600x800
         self.configure(bg="#f0f4f8")
         self.resizable(False, False)
 
@@ -51,6 +623,14 @@ class ArbolGenealogicoApp(tk.Tk):
         titulo = tk.Label(self, text="Árbol Genealógico", font=("Arial Rounded MT Bold", 24), bg="#f0f4f8", fg="#2d415a")
         titulo.pack(pady=20)
 
+        # Botones para importar y exportar el árbol completo (GEDCOM o CSV)
+        marco_archivo = tk.Frame(self, bg="#f0f4f8")
+        marco_archivo.pack(pady=(0, 5))
+        btn_importar = tk.Button(marco_archivo, text="Importar...", command=self.importar_archivo, bg="#4a90e2", fg="white", font=("Arial", 10, "bold"))
+        btn_importar.pack(side="left", padx=5)
+        btn_exportar = tk.Button(marco_archivo, text="Exportar...", command=self.exportar_archivo, bg="#4a90e2", fg="white", font=("Arial", 10, "bold"))
+        btn_exportar.pack(side="left", padx=5)
+
         # Marco para agregar personas
         marco_agregar = tk.LabelFrame(self, text="Agregar Persona", bg="#e3eaf2", font=("Arial", 12, "bold"))
         marco_agregar.pack(padx=20, pady=10, fill="x")
@@ -90,7 +670,26 @@ class ArbolGenealogicoApp(tk.Tk):
 
         # Botón para buscar ancestros
         btn_buscar = tk.Button(marco_buscar, text="Buscar", command=self.buscar_ancestros, bg="#4a90e2", fg="white", font=("Arial", 10, "bold"))
-        btn_buscar.grid(row=2, column=0, columnspan=2, pady=10)
+        btn_buscar.grid(row=2, column=0, pady=10)
+
+        # Botón para listar descendientes en la generación indicada
+        btn_descendientes = tk.Button(marco_buscar, text="Descendientes", command=self.buscar_descendientes, bg="#4a90e2", fg="white", font=("Arial", 10, "bold"))
+        btn_descendientes.grid(row=2, column=1, pady=10)
+
+        # Marco para calcular el parentesco entre dos personas
+        marco_parentesco = tk.LabelFrame(self, text="Parentesco", bg="#e3eaf2", font=("Arial", 12, "bold"))
+        marco_parentesco.pack(padx=20, pady=10, fill="x")
+
+        tk.Label(marco_parentesco, text="Persona A:", bg="#e3eaf2").grid(row=0, column=0, padx=5, pady=5, sticky="e")
+        self.combo_pariente_a = ttk.Combobox(marco_parentesco, values=[], state="readonly", width=18)
+        self.combo_pariente_a.grid(row=0, column=1, padx=5, pady=5)
+
+        tk.Label(marco_parentesco, text="Persona B:", bg="#e3eaf2").grid(row=1, column=0, padx=5, pady=5, sticky="e")
+        self.combo_pariente_b = ttk.Combobox(marco_parentesco, values=[], state="readonly", width=18)
+        self.combo_pariente_b.grid(row=1, column=1, padx=5, pady=5)
+
+        btn_parentesco = tk.Button(marco_parentesco, text="Calcular", command=self.mostrar_parentesco, bg="#4a90e2", fg="white", font=("Arial", 10, "bold"))
+        btn_parentesco.grid(row=2, column=0, columnspan=2, pady=10)
 
         # Marco para mostrar resultados
         self.marco_resultados = tk.LabelFrame(self, text="Resultados", bg="#e3eaf2", font=("Arial", 12, "bold"))
@@ -113,6 +712,8 @@ class ArbolGenealogicoApp(tk.Tk):
         self.combo_padre['values'] = [""] + nombres
         self.combo_madre['values'] = [""] + nombres
         self.combo_persona['values'] = nombres
+        self.combo_pariente_a['values'] = nombres
+        self.combo_pariente_b['values'] = nombres
 
     def agregar_persona(self):
         # Obtiene los datos ingresados
@@ -133,10 +734,13 @@ class ArbolGenealogicoApp(tk.Tk):
         madre = self.personas.get(madre_nombre) if madre_nombre else None
 
         if nombre in self.personas:
-            # Si la persona ya existe, actualiza sus padres
+            # Si la persona ya existe, actualiza sus padres (sin permitir ciclos)
             persona = self.personas[nombre]
-            persona.padre = padre
-            persona.madre = madre
+            try:
+                persona.asignar_padres(padre, madre)
+            except ValueError as error:
+                messagebox.showerror("Error", str(error))
+                return
             messagebox.showinfo("Actualizado", f"Padres de '{nombre}' actualizados correctamente.")
         else:
             # Crea la nueva persona y la agrega al diccionario
@@ -150,13 +754,49 @@ class ArbolGenealogicoApp(tk.Tk):
         self.combo_madre.set("")
         self.actualizar_comboboxes()
 
+    def importar_archivo(self):
+        # Carga un GEDCOM (.ged) o un CSV nombre,padre,madre y muestra un resumen
+        ruta = filedialog.askopenfilename(
+            title="Importar árbol",
+            filetypes=[("GEDCOM o CSV", "*.ged *.csv"), ("Todos los archivos", "*.*")])
+        if not ruta:
+            return
+        try:
+            if ruta.lower().endswith(".ged"):
+                reporte = importar_gedcom(ruta, self.personas)
+            else:
+                reporte = importar_csv(ruta, self.personas)
+        except (OSError, UnicodeDecodeError, csv.Error) as error:
+            messagebox.showerror("Error", f"No se pudo leer el archivo:\n{error}")
+            return
+        self.actualizar_comboboxes()
+        messagebox.showinfo("Importación", (
+            f"Personas nuevas: {reporte['cargados']}\n"
+            f"Actualizadas: {reporte['actualizados']}\n"
+            f"Referencias sin registro propio: {len(reporte['huerfanos'])}\n"
+            f"Enlaces eliminados por ciclos: {len(reporte['ciclos'])}\n"
+            f"Filas con errores: {len(reporte['errores'])}"))
+
+    def exportar_archivo(self):
+        # Guarda el árbol como GEDCOM o CSV según la extensión elegida
+        ruta = filedialog.asksaveasfilename(
+            title="Exportar árbol", defaultextension=".ged",
+            filetypes=[("GEDCOM", "*.ged"), ("CSV", "*.csv")])
+        if not ruta:
+            return
+        try:
+            if ruta.lower().endswith(".csv"):
+                exportar_csv(self.personas, ruta)
+            else:
+                exportar_gedcom(self.personas, ruta)
+        except OSError as error:
+            messagebox.showerror("Error", f"No se pudo guardar el archivo:\n{error}")
+            return
+        messagebox.showinfo("Exportación", f"{len(self.personas)} personas guardadas en {os.path.basename(ruta)}.")
+
     def buscar_hermanos(self, persona):
         # Devuelve una lista de hermanos (excluyendo a la persona misma)
-        hermanos = []
-        for p in self.personas.values():
-            if p is not persona and p.padre == persona.padre and p.madre == persona.madre and (p.padre or p.madre):
-                hermanos.append(p.nombre)
-        return hermanos
+        return [p.nombre for p in persona.hermanos()]
 
     def mostrar_arbol(self, persona):
         # Construye el árbol desde la persona seleccionada hacia los ancestros,
@@ -207,8 +847,120 @@ class ArbolGenealogicoApp(tk.Tk):
         else:
             self.lista_resultados.insert(tk.END, "No se encontró la persona.")
 
+    def buscar_descendientes(self):
+        # Lista los descendientes de la generación indicada (como máximo MAX_RESULTADOS)
+        nombre = self.combo_persona.get()
+        generacion_str = self.entrada_generacion.get().strip()
+        if not nombre:
+            messagebox.showerror("Error", "Seleccione una persona.")
+            return
+        if not generacion_str.isdigit() or int(generacion_str) < 1:
+            messagebox.showerror("Error", "La generación debe ser un número entero positivo.")
+            return
+        persona = self.personas[nombre]
+        self.lista_resultados.delete(0, tk.END)
+        self.lista_resultados.insert(tk.END, f"{nombre} tiene {persona.num_descendientes()} descendientes en total.")
+        nombres = list(islice(encontrar_descendientes(persona, int(generacion_str)), MAX_RESULTADOS + 1))
+        for descendiente in nombres[:MAX_RESULTADOS]:
+            self.lista_resultados.insert(tk.END, f"- {descendiente}")
+        if not nombres:
+            self.lista_resultados.insert(tk.END, "No hay descendientes en esa generación.")
+        elif len(nombres) > MAX_RESULTADOS:
+            self.lista_resultados.insert(tk.END, f"... (se muestran los primeros {MAX_RESULTADOS})")
+
+    def mostrar_parentesco(self):
+        # Calcula qué es la persona A para la persona B y lo muestra en resultados
+        nombre_a = self.combo_pariente_a.get()
+        nombre_b = self.combo_pariente_b.get()
+        if not nombre_a or not nombre_b:
+            messagebox.showerror("Error", "Seleccione dos personas.")
+            return
+        resultado = calcular_parentesco(self.personas[nombre_a], self.personas[nombre_b])
+        self.lista_resultados.delete(0, tk.END)
+        if resultado is None:
+            self.lista_resultados.insert(tk.END, f"{nombre_a} y {nombre_b} no tienen ancestros comunes conocidos.")
+            return
+        self.lista_resultados.insert(tk.END, f"{nombre_a} es {resultado['termino']} de {nombre_b}.")
+        self.lista_resultados.insert(tk.END, "Ancestros comunes más cercanos: " + ", ".join(resultado["ancestros_comunes"]))
+        i, j = resultado["generaciones"]
+        self.lista_resultados.insert(tk.END, f"Generaciones hasta ellos: {i} desde {nombre_a}, {j} desde {nombre_b}")
+
+# Consultas de parentesco entre parejas al azar de una población grande
+def benchmark_parentesco(generaciones=40, por_generacion=25_000, consultas=200):
+    inicio = time.perf_counter()
+    personas = generar_poblacion_endogamica(generaciones, por_generacion)
+    print(f"Población de {len(personas)} personas en {time.perf_counter() - inicio:.1f} s")
+    aleatorio = random.Random(1)
+    ultimas = personas[-5 * por_generacion:]
+    tiempos = []
+    for _ in range(consultas):
+        a, b = aleatorio.sample(ultimas, 2)
+        inicio = time.perf_counter()
+        calcular_parentesco(a, b)
+        tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    print(f"{consultas} consultas de parentesco: mediana {tiempos[len(tiempos) // 2] * 1000:.1f} ms, "
+          f"máximo {tiempos[-1] * 1000:.1f} ms")
+
+# Reasignaciones de padres al azar: cuánto cuesta mantener el orden y rechazar ciclos
+def benchmark_reasignaciones(generaciones=40, por_generacion=5_000, cambios=2_000):
+    personas = generar_poblacion_endogamica(generaciones, por_generacion)
+    aleatorio = random.Random(2)
+    rechazados = 0
+    inicio = time.perf_counter()
+    for _ in range(cambios):
+        persona, padre, madre = aleatorio.sample(personas, 3)
+        try:
+            persona.asignar_padres(padre, madre)
+        except ValueError:
+            rechazados += 1
+    segundos = time.perf_counter() - inicio
+    print(f"{cambios} reasignaciones en {len(personas)} personas: {segundos / cambios * 1000:.2f} ms de media, "
+          f"{rechazados} rechazadas por formar ciclos")
+
+# Conteo de descendientes (primera vez y desde la caché) y primeros nietos lejanos
+def benchmark_descendientes(generaciones=40, por_generacion=5_000):
+    personas = generar_poblacion_endogamica(generaciones, por_generacion)
+    fundador = personas[0]
+    inicio = time.perf_counter()
+    total = fundador.num_descendientes()
+    primera = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    fundador.num_descendientes()
+    cache = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    primeros = list(islice(encontrar_descendientes(fundador, generaciones - 10), 10))
+    perezoso = time.perf_counter() - inicio
+    print(f"{total} descendientes de {fundador.nombre}: {primera * 1000:.1f} ms, con caché {cache * 1000:.3f} ms; "
+          f"primeros {len(primeros)} de la generación {generaciones - 10} en {perezoso * 1000:.1f} ms")
+
+# Exporta una población grande y la vuelve a importar en ambos formatos
+def benchmark_importacion(generaciones=40, por_generacion=25_000):
+    personas = {p.nombre: p for p in generar_poblacion_endogamica(generaciones, por_generacion)}
+    with tempfile.TemporaryDirectory() as directorio:
+        for formato, exportar, importar in (("CSV", exportar_csv, importar_csv),
+                                            ("GEDCOM", exportar_gedcom, importar_gedcom)):
+            ruta = os.path.join(directorio, "arbol." + formato.lower())
+            inicio = time.perf_counter()
+            exportar(personas, ruta)
+            segundos_exportar = time.perf_counter() - inicio
+            nuevas = {}
+            inicio = time.perf_counter()
+            reporte = importar(ruta, nuevas)
+            segundos_importar = time.perf_counter() - inicio
+            print(f"{formato}: exportar {len(personas)} personas {segundos_exportar:.1f} s, "
+                  f"importar {reporte['cargados']} en {segundos_importar:.1f} s "
+                  f"({os.path.getsize(ruta) / 2**20:.0f} MiB)")
+            del nuevas
+
 # Punto de entrada principal
-if __name__ == "__main__":
+if __name__ == "__main__" and "--benchmark" in sys.argv[1:]:
+    benchmark_reasignaciones()
+    benchmark_descendientes()
+    benchmark_ancestros()
+    benchmark_parentesco()
+    benchmark_importacion()
+elif __name__ == "__main__":
     # Crea y ejecuta la aplicación
     app = ArbolGenealogicoApp()
     app.mainloop()
\ No newline at end of file